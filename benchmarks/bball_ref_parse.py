@@ -0,0 +1,43 @@
+'''Benchmark: targeted lxml table extraction vs. parsing whole bball-ref pages with BeautifulSoup.
+
+Run from the repository root, as a module so that `dans` can be imported:
+
+    python -m benchmarks.bball_ref_parse
+'''
+import os
+import timeit
+import pandas as pd
+
+from dans.library.request.basketball_reference import BasketballReferenceSource
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(__file__)), "dans", "library", "request", "cache", "data")
+
+PAGES = {
+    "SC2015-17BX.txt": "player_game_log_post",
+    "KB2003BX.txt": "player_game_log_post",
+    "KAJ1974BX.txt": "player_game_log_reg",
+    "LAL2003BX.txt": "team_game_log_adv_post",
+    "MIL1974BX.txt": "team_game_log_adv_reg",
+}
+
+def main(repeat: int = 5):
+    source = BasketballReferenceSource()
+    print(f"{'page':<18}{'KB':>8}{'soup ms':>10}{'lxml ms':>10}{'speedup':>9}")
+    for page, table_id in PAGES.items():
+        with open(os.path.join(DATA, page), "r", encoding="utf-8") as file:
+            html = file.read()
+        attr_id = {"id": table_id}
+
+        fragment = source._table_fragment(html, attr_id)
+        pd.testing.assert_frame_equal(source._parse_fragment(fragment),
+                                      source._parse_with_soup(html, attr_id))
+
+        soup = min(timeit.repeat(lambda: source._parse_with_soup(html, attr_id),
+                                 number=1, repeat=repeat))
+        targeted = min(timeit.repeat(lambda: source._parse_fragment(source._table_fragment(html, attr_id)),
+                                     number=1, repeat=repeat))
+        print(f"{page:<18}{len(html) / 1024:>8.0f}{soup * 1000:>10.1f}{targeted * 1000:>10.1f}"
+              f"{soup / targeted:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,13 @@
 '''Player Logs Endpoint'''
-import os
 import numpy as np
 import pandas as pd
-from tqdm import tqdm
 
 from dans.endpoints._base import LogsEndpoint
+from dans.library.metrics import Metrics
 from dans.library.parameters import SeasonType
+from dans.library.player_index import PlayerIndex
 from dans.library.request.request import Request
+from dans.library.season_snapshots import SeasonSnapshotStore
 
 class BXPlayerLogs(LogsEndpoint):
     '''Finds a player's game logs within a given range of years'''
@@ -42,6 +43,13 @@ class BXPlayerLogs(LogsEndpoint):
         'PLUS_MINUS'
     ]
     
+    # Columns of the league-wide nba-stats tables that the logs are built from
+    nba_stats_columns = [
+        'SEASON_YEAR', 'GAME_DATE', 'PLAYER_NAME', 'TEAM_ABBREVIATION', 'MATCHUP', 'WL',
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT','FTM', 'FTA', 'FT_PCT',
+        'OREB', 'DREB', 'REB', 'AST', 'TOV', 'STL', 'BLK', 'PF', 'PTS', 'PLUS_MINUS'
+    ]
+
     error = None
 
     def __init__(
@@ -56,108 +64,232 @@ class BXPlayerLogs(LogsEndpoint):
         self.suffix = self._lookup(name)
 
     def _lookup(self, name):
-        path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                            'data/player_names.csv')
-        names_df = pd.read_csv(path)
-
-        player = names_df[names_df["NAME"] == name]["SUFFIX"]
-        if len(player) == 0:
-            self.error = f"Player not found: `{name}`"
-            return None
-        return player.iloc[0]
+        # Names that only match once normalized take the site's spelling, which the
+        # site's tables use
+        player, self.name, error = PlayerIndex.find(name, "SUFFIX")
+        if error is not None:
+            self.error = error
+        return player
 
     def bball_ref(self):
         '''Uses bball-ref to find player game logs.'''
 
-        if self.year_range[0] < 1971:
-            self.error = "This API does not have support for bball-ref before 1970-71."
+        years = self._bball_ref_years()
+        if not years:
             return pd.DataFrame()
 
-        if not self.suffix:
-            return pd.DataFrame()
-
-        format_suffix = 'players/' + self.suffix[0] + '/' + self.suffix
-        iterator = tqdm(range(self.year_range[0], self.year_range[1] + 1),
-                        desc="Loading player game logs...", ncols=75, leave=False)
+        iterator = Metrics.progress(years, "player_logs", "Loading player game logs...")
 
         dfs = []
+        failed = []
         for curr_year in iterator:
-            if self.season_type == SeasonType.playoffs:
-                url = f'https://www.basketball-reference.com/{format_suffix}/gamelog-playoffs/'
-                attr_id = "player_game_log_post"
-            else:
-                url = f'https://www.basketball-reference.com/{format_suffix}/gamelog/{curr_year}'
-                attr_id = "player_game_log_reg"
-
-            data_pd = Request(url=url, attr_id={"id": attr_id}).get_response()
+            data_pd = self._bball_ref_request(curr_year).get_response()
             if data_pd.empty:
-                return pd.DataFrame()
+                failed.append(curr_year)
+                continue
 
             if len(data_pd.columns) < 10:
                 continue
 
-            data_pd = data_pd.drop(columns=["Gtm", "GS"], axis=1)\
-                .replace("", np.nan)
-
-            data_pd = data_pd[~(
-                (data_pd["Gcar"].astype(str).str.contains("nan")) |
-                (data_pd["Gcar"].astype(str).str.contains("none"))
-                )]\
-                .rename(columns={
-                    data_pd.columns[1]: "GAME_DATE",
-                    'Result': 'WL',
-                    "Team": "TEAM",
-                    "Opp": "MATCHUP",
-                    "MP": "MIN",
-                    "": "LOCATION",
-                    "FG": "FGM",
-                    "FG%": "FG_PCT",
-                    "3P": "FG3M",
-                    "3PA": "FG3A",
-                    "3P%": "FG3_PCT",
-                    "FT": "FTM",
-                    "FT%": "FT_PCT",
-                    "ORB": "OREB",
-                    "DRB": "DREB",
-                    "TRB": "REB",
-                    "+/-": "PLUS_MINUS"
-                })\
-                .dropna(subset=["AST"])\
-                .drop(columns=["Gcar"])
-
-            # Calculate Season from Game Date column instead of using `curr_year` because playoff
-            # game logs shows for all years
-            if self.season_type == SeasonType.regular_season:
-                data_pd["SEASON"] = curr_year
-            else:
-                data_pd["SEASON"] = data_pd["GAME_DATE"].str[0:4].astype(int)
-
-
-            try:
-                data_pd["MIN"] = data_pd["MIN"].str.extract(r'([1-9]*[0-9]):').astype("int32") + \
-                            data_pd["MIN"].str.extract(r':([0-5][0-9])').astype("int32") / 60
-            except:
-                pass
-
-            convert_dict = {
-                'SEASON': 'int32', 'GAME_DATE': 'string', 'TEAM': 'string', 'MATCHUP': 'string',
-                'MIN': 'float64','FGM': 'int32', 'FGA': 'int32', 'FG_PCT': 'float64', 'FG3M': 'float32',
-                'FG3A': 'float32', 'FG3_PCT': 'float64', 'FTM': 'int32', 'FTA': 'int32',
-                'FT_PCT': 'float32', 'OREB': 'float32', 'DREB': 'float32', 'REB': 'int32',
-                'AST' : 'int32', 'STL': 'float32', 'BLK': 'float32', 'TOV' : 'float32',
-                'PF': 'int32', 'PTS': 'int32', 'GmSc': 'float64', 'PLUS_MINUS' : 'float32',
-                '2P': 'float32', "2PA": 'float32', '2P%': 'float64', 'eFG%': "float64",
-                'LOCATION': 'string', 'WL': 'string'
-            }
-            data_pd = data_pd.astype({key: convert_dict[key] for key in data_pd.columns.values})
-
-            dfs.append(data_pd)
-
-            if self.season_type == SeasonType.playoffs:
-                for _ in iterator:
-                    pass
-                break
-            continue
+            dfs.append(self._format_bball_ref_year(data_pd, curr_year))
+
+        if failed:
+            return self._failed(failed)
+        return self._combine_bball_ref(dfs)
+
+    async def bball_ref_async(self):
+        '''Same as `bball_ref`, but requests every season concurrently.'''
+
+        years = self._bball_ref_years()
+        if not years:
+            return pd.DataFrame()
+
+        responses = await Metrics.gather(
+            *(self._bball_ref_request(curr_year).get_response_async() for curr_year in years),
+            stage="player_logs", desc="Loading player game logs...")
+
+        failed = [curr_year for curr_year, data_pd in zip(years, responses) if data_pd.empty]
+        if failed:
+            return self._failed(failed)
+
+        return self._combine_bball_ref([
+            self._format_bball_ref_year(data_pd, curr_year)
+            for curr_year, data_pd in zip(years, responses) if len(data_pd.columns) >= 10
+        ])
+
+    def nba_stats(self):
+        '''Uses nba-stats to find player game logs'''
+
+        years = self._nba_stats_years()
+        if not years:
+            return pd.DataFrame()
+
+        iterator = Metrics.progress(years, "player_logs", "Loading player game logs...")
+
+        store = SeasonSnapshotStore()
+        dfs = []
+        failed = []
+        for curr_year in iterator:
+            year_df = store.get(curr_year, self.season_type, per_mode="PerGame",
+                                columns=self.nba_stats_columns)
+            
+            if year_df.empty:
+                failed.append(curr_year)
+                continue
+
+            dfs.append(self._format_nba_stats_year(year_df, curr_year))
+
+        if failed:
+            return self._failed(failed)
+        return self._combine_nba_stats(dfs)
+
+    async def nba_stats_async(self):
+        '''Same as `nba_stats`, but requests every season concurrently.'''
+
+        years = self._nba_stats_years()
+        if not years:
+            return pd.DataFrame()
+
+        store = SeasonSnapshotStore()
+        responses = await Metrics.gather(
+            *(store.get_async(curr_year, self.season_type, per_mode="PerGame",
+                              columns=self.nba_stats_columns) for curr_year in years),
+            stage="player_logs", desc="Loading player game logs...")
+
+        failed = [curr_year for curr_year, year_df in zip(years, responses) if year_df.empty]
+        if failed:
+            return self._failed(failed)
+
+        return self._combine_nba_stats([
+            self._format_nba_stats_year(year_df, curr_year)
+            for curr_year, year_df in zip(years, responses)
+        ])
+
+    @classmethod
+    def nba_stats_batch(cls, names: list[str], year_range, season_type=SeasonType.default) -> dict:
+        '''Uses nba-stats to find the game logs of many players, with one request per season.
+
+        Returns a dictionary from each name to the DataFrame `nba_stats` would return.
+        '''
+
+        players = [cls(name, year_range, season_type) for name in names]
+        years = sorted({year for player in players for year in player._nba_stats_years()})
+
+        store = SeasonSnapshotStore()
+        iterator = Metrics.progress(years, "season_logs", "Loading season game logs...")
+
+        # Split each season's table by player once, instead of scanning it for every player
+        tables = {}
+        season_players = {}
+        for curr_year in iterator:
+            tables[curr_year] = store.get(curr_year, season_type, per_mode="PerGame",
+                                          columns=cls.nba_stats_columns)
+            season_players[curr_year] = dict(tuple(
+                tables[curr_year].groupby("PLAYER_NAME", sort=False, observed=True)
+            )) if not tables[curr_year].empty else {}
+
+        logs = {}
+        for name, player in zip(names, players):
+            player_years = player._nba_stats_years()
+            if not player_years or any(tables[year].empty for year in player_years):
+                logs[name] = pd.DataFrame()
+                continue
+            logs[name] = player._combine_nba_stats([
+                player._format_nba_stats_year(
+                    season_players[year].get(player.name, tables[year].iloc[:0]), year)
+                for year in player_years
+            ])
+        return logs
+
+    def _failed(self, years: list[int]) -> pd.DataFrame:
+        # Every other season was still requested, and the ones that loaded are cached
+        self.error = f"Failed to load game logs for {years}. Seasons that loaded are " + \
+            "cached, so running this again only requests the missing ones."
+        print(self.error)
+        return pd.DataFrame()
+
+    def _bball_ref_years(self) -> list[int]:
+        if self.year_range[0] < 1971:
+            self.error = "This API does not have support for bball-ref before 1970-71."
+            return []
+
+        if not self.suffix:
+            return []
+
+        # Playoff game logs for every season are on a single page
+        if self.season_type == SeasonType.playoffs:
+            return [self.year_range[0]]
+        return list(range(self.year_range[0], self.year_range[1] + 1))
+
+    def _bball_ref_request(self, curr_year: int) -> Request:
+        format_suffix = 'players/' + self.suffix[0] + '/' + self.suffix
+        if self.season_type == SeasonType.playoffs:
+            url = f'https://www.basketball-reference.com/{format_suffix}/gamelog-playoffs/'
+            attr_id = "player_game_log_post"
+        else:
+            url = f'https://www.basketball-reference.com/{format_suffix}/gamelog/{curr_year}'
+            attr_id = "player_game_log_reg"
+        return Request(url=url, attr_id={"id": attr_id})
+
+    def _format_bball_ref_year(self, data_pd: pd.DataFrame, curr_year: int) -> pd.DataFrame:
+        data_pd = data_pd.drop(columns=["Gtm", "GS"], axis=1)\
+            .replace("", np.nan)
+
+        data_pd = data_pd[~(
+            (data_pd["Gcar"].astype(str).str.contains("nan")) |
+            (data_pd["Gcar"].astype(str).str.contains("none"))
+            )]\
+            .rename(columns={
+                data_pd.columns[1]: "GAME_DATE",
+                'Result': 'WL',
+                "Team": "TEAM",
+                "Opp": "MATCHUP",
+                "MP": "MIN",
+                "": "LOCATION",
+                "FG": "FGM",
+                "FG%": "FG_PCT",
+                "3P": "FG3M",
+                "3PA": "FG3A",
+                "3P%": "FG3_PCT",
+                "FT": "FTM",
+                "FT%": "FT_PCT",
+                "ORB": "OREB",
+                "DRB": "DREB",
+                "TRB": "REB",
+                "+/-": "PLUS_MINUS"
+            })\
+            .dropna(subset=["AST"])\
+            .drop(columns=["Gcar"])
+
+        # Calculate Season from Game Date column instead of using `curr_year` because playoff
+        # game logs shows for all years
+        if self.season_type == SeasonType.regular_season:
+            data_pd["SEASON"] = curr_year
+        else:
+            data_pd["SEASON"] = data_pd["GAME_DATE"].str[0:4].astype(int)
+
+
+        try:
+            data_pd["MIN"] = data_pd["MIN"].str.extract(r'([1-9]*[0-9]):').astype("int32") + \
+                        data_pd["MIN"].str.extract(r':([0-5][0-9])').astype("int32") / 60
+        except:
+            pass
+
+        convert_dict = {
+            'SEASON': 'int32', 'GAME_DATE': 'string', 'TEAM': 'string', 'MATCHUP': 'string',
+            'MIN': 'float64','FGM': 'int32', 'FGA': 'int32', 'FG_PCT': 'float64', 'FG3M': 'float32',
+            'FG3A': 'float32', 'FG3_PCT': 'float64', 'FTM': 'int32', 'FTA': 'int32',
+            'FT_PCT': 'float32', 'OREB': 'float32', 'DREB': 'float32', 'REB': 'int32',
+            'AST' : 'int32', 'STL': 'float32', 'BLK': 'float32', 'TOV' : 'float32',
+            'PF': 'int32', 'PTS': 'int32', 'GmSc': 'float64', 'PLUS_MINUS' : 'float32',
+            '2P': 'float32', "2PA": 'float32', '2P%': 'float64', 'eFG%': "float64",
+            'LOCATION': 'string', 'WL': 'string'
+        }
+        return data_pd.astype({key: convert_dict[key] for key in data_pd.columns.values})
+
+    def _combine_bball_ref(self, dfs: list[pd.DataFrame]) -> pd.DataFrame:
+        if len(dfs) == 0:
+            return pd.DataFrame()
 
         result = pd.concat(dfs)\
             .query("SEASON >= @self.year_range[0] and SEASON <= @self.year_range[1]")
@@ -172,46 +304,29 @@ class BXPlayerLogs(LogsEndpoint):
             print(self.error)
         return result[self.expected_columns].reset_index(drop=True)
 
-    def nba_stats(self):
-        '''Uses nba-stats to find player game logs'''
-
+    def _nba_stats_years(self) -> list[int]:
         if self.year_range[0] < 1997:
             self.error = "This API does not have support for nba-stats before 1996-97."
-            return pd.DataFrame()
+            return []
 
         if not self.suffix:
-            return pd.DataFrame()
-
-        iterator = tqdm(range(self.year_range[0], self.year_range[1] + 1),
-                        desc="Loading player game logs...", ncols=75, leave=False)
-
-        dfs = []
-        for curr_year in iterator:
-            url = 'https://stats.nba.com/stats/playergamelogs'
-            year_df = Request(
-                url=url,
-                year=curr_year,
-                season_type=self.season_type,
-                per_mode="PerGame"
-            ).get_response()
-            
-            if year_df.empty:
-                return pd.DataFrame()
-
-            year_df = year_df.query('PLAYER_NAME == @self.name')\
-                [['SEASON_YEAR', 'GAME_DATE', 'PLAYER_NAME', 'TEAM_ABBREVIATION', 'MATCHUP', 'WL',
-                'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT','FTM', 'FTA', 'FT_PCT',
-                'OREB', 'DREB', 'REB', 'AST', 'TOV', 'STL', 'BLK', 'PF', 'PTS', 'PLUS_MINUS']]\
-                .rename(columns={
-                    'SEASON_YEAR': 'SEASON', 'TEAM_ABBREVIATION': 'TEAM'})[::-1]
-            year_df['GAME_DATE'] = year_df['GAME_DATE'].str[:10]
-            year_df['LOCATION'] = ''
-            year_df.loc[(year_df['MATCHUP'].str.contains('@')), 'LOCATION'] = '@'
-            year_df['MATCHUP'] = year_df['MATCHUP'].str[-3:]
-            year_df['SEASON'] = curr_year
-
-            dfs.append(year_df)
-
+            return []
+
+        return list(range(self.year_range[0], self.year_range[1] + 1))
+
+    def _format_nba_stats_year(self, year_df: pd.DataFrame, curr_year: int) -> pd.DataFrame:
+        year_df = year_df.query('PLAYER_NAME == @self.name')\
+            [self.nba_stats_columns]\
+            .rename(columns={
+                'SEASON_YEAR': 'SEASON', 'TEAM_ABBREVIATION': 'TEAM'})[::-1]
+        year_df['GAME_DATE'] = year_df['GAME_DATE'].dt.strftime('%Y-%m-%d')
+        year_df['LOCATION'] = ''
+        year_df.loc[(year_df['MATCHUP'].str.contains('@')), 'LOCATION'] = '@'
+        year_df['MATCHUP'] = year_df['MATCHUP'].str[-3:]
+        year_df['SEASON'] = curr_year
+        return year_df
+
+    def _combine_nba_stats(self, dfs: list[pd.DataFrame]) -> pd.DataFrame:
         if len(dfs) == 0:
             return pd.DataFrame()
 
@@ -220,7 +335,8 @@ class BXPlayerLogs(LogsEndpoint):
                 'FGM': 'int32', 'FGA': 'int32', 'FG3M': 'int32', 'FG3A': 'int32', 'FTA': 'int32',
                 'FTM': 'int32', 'OREB': 'int32', 'DREB': 'int32', 'REB': 'int32', 'AST': 'int32',
                 'TOV': 'int32', 'STL': 'int32', 'BLK': 'int32', 'PF': 'int32', 'PTS': 'int32',
-                'PLUS_MINUS': 'float32', 'SEASON': 'object'})
+                'PLUS_MINUS': 'float32', 'SEASON': 'object', 'PLAYER_NAME': 'object',
+                'TEAM': 'object', 'WL': 'object'})
 
         result["SEASON_TYPE"] = self.season_type
         if self.error:
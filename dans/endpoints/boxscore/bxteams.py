@@ -1,8 +1,6 @@
 '''Teams Endpoint'''
-import os
-import pandas as pd
-
 from dans.endpoints._base import LogsEndpoint
+from dans.library.reference_data import ReferenceData
 
 class BXTeams(LogsEndpoint):
     '''Endpoint for finding teams with defensive strength that falls within a desired range'''
@@ -22,26 +20,23 @@ class BXTeams(LogsEndpoint):
     ):
         self.year_range = year_range
         self.drtg_range = drtg_range
-        self.path = None
+        self.table = None
         self.adj_def = adj_def
 
     def bball_ref(self):
         '''Reads bball-ref team data and return teams that falls within self.drtg_range'''
-        self.path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                                     'data/bball-ref-teams.csv')
+        self.table = "bball_ref_teams"
         self.adj_def = False
         return self._read_path()
 
     def nba_stats(self):
         '''Reads nba-stats team data and return teams that falls within self.drtg_range'''
-        self.path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                                     'data/nba-stats-teams.csv')
+        self.table = "nba_stats_teams"
         return self._read_path()
 
     def _read_path(self):
-        teams_df = pd.read_csv(self.path).drop(columns="Unnamed: 0")
-        
-        
+        teams_df = ReferenceData.table(self.table)
+
         drtg = "ADJ_DRTG" if self.adj_def else "DRTG"
         
         teams_df = teams_df[
@@ -0,0 +1,114 @@
+'''Lineups Endpoint'''
+import pandas as pd
+
+from dans.endpoints._base import StatsEndpoint
+from dans.endpoints.playbyplay.pbpplayerstats import PBPPlayerStats
+from dans.library.metrics import Metrics
+from dans.library.pbp_processor import PBPProcessor
+from dans.library.pbp_stints import StintIndex
+from dans.library.prefetch import prefetch
+from dans.library.request.retry import RequestError
+from dans.library.request.response_cache import request_season
+
+class PBPLineups(StatsEndpoint):
+    '''Finds the five-man lineup and on/off stats of a team in the given games'''
+
+    expected_lineup_columns = [
+        'PLAYER_IDS',
+        'LINEUP',
+        'GAMES',
+        'MIN',
+        'POSS',
+        'OPP_POSS',
+        'PTS',
+        'OPP_PTS',
+        'ORTG',
+        'DRTG',
+        'NET_RTG',
+        'ADJ_ORTG'
+    ]
+
+    expected_on_off_columns = [
+        'PLAYER_ID',
+        'PLAYER_NAME',
+        'ON_MIN',
+        'ON_POSS',
+        'ON_ORTG',
+        'ON_DRTG',
+        'ON_NET_RTG',
+        'ON_ADJ_ORTG',
+        'OFF_MIN',
+        'OFF_POSS',
+        'OFF_ORTG',
+        'OFF_DRTG',
+        'OFF_NET_RTG',
+        'OFF_ADJ_ORTG',
+        'ON_OFF'
+    ]
+
+    error = None
+
+    def __init__(
+        self,
+        game_ids: list,
+        team: str,
+        adj_def=True
+    ):
+        self.game_ids = list(game_ids)
+        self.team = team
+        self.adj_def = adj_def
+
+        teams, _ = PBPPlayerStats._reference_tables()
+        self.stints = StintIndex(team, teams, adj_def)
+
+        self._iterate_through_games()
+
+    def bball_ref(self):
+        return NotImplementedError()
+
+    def nba_stats(self):
+        if self.error is not None:
+            return pd.DataFrame()
+        lineups = self.stints.lineups()
+        if lineups.empty:
+            print("No lineups found.")
+            return pd.DataFrame()
+        return lineups[self.expected_lineup_columns]
+
+    def on_off(self):
+        if self.error is not None:
+            return pd.DataFrame()
+        on_off = self.stints.on_off()
+        if on_off.empty:
+            print("No lineups found.")
+            return pd.DataFrame()
+        return on_off[self.expected_on_off_columns]
+
+    def get_processed_logs(self):
+        return self.stints.get_segments()
+
+    def _iterate_through_games(self):
+
+        processor = PBPProcessor()
+        failed_games = []
+        games = prefetch(processor.fetch, self.game_ids, PBPPlayerStats.prefetch_depth)
+        iterator = Metrics.progress(games, "pbp_games", 'Loading play-by-plays...', len(self.game_ids))
+        try:
+            for game_id, fetched in iterator:
+                try:
+                    prepared = processor.prepare(game_id, fetched.result())
+                except RequestError:
+                    failed_games.append(game_id)
+                    continue
+                self.stints.add_game(prepared, request_season({"args": {"game_id": game_id}}))
+        except ValueError as e:
+            self.error = str(e)
+            print(f"Error: {self.error}")
+            return
+        finally:
+            games.close()
+
+        if failed_games:
+            self.error = f"Failed to load play-by-plays for games {failed_games}. Games " + \
+                "that loaded are stored, so running this again only requests the missing ones."
+            print(self.error)
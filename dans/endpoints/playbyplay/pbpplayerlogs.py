@@ -1,11 +1,12 @@
 '''Player Logs Endpoint'''
-import os
 import numpy as np
 import pandas as pd
 
 from dans.endpoints._base import LogsEndpoint
 from dans.library.parameters import SeasonType
 from dans.library.nba_api_client import NBAApiClient
+from dans.library.player_index import PlayerIndex
+from dans.library.request.retry import RequestError
 
 class PBPPlayerLogs(LogsEndpoint):
     '''Finds a player's game logs within a given range of years'''
@@ -63,12 +64,23 @@ class PBPPlayerLogs(LogsEndpoint):
     def nba_stats(self):
         
         dfs = []
+        failed = []
         for year in range(self.year_range[0], self.year_range[1] + 1):
             
-            df = NBAApiClient().get_player_game_log(player_id=self.player_id, season=year, season_type=self.season_type)
+            try:
+                df = NBAApiClient().get_player_game_log(player_id=self.player_id, season=year, season_type=self.season_type)
+            except RequestError:
+                failed.append(year)
+                continue
             df['SEASON'] = year
             if not df.empty:
                 dfs.append(df)
+
+        if failed:
+            self.error = f"Failed to load game logs for {failed}. Seasons that loaded are " + \
+                "cached, so running this again only requests the missing ones."
+            print(self.error)
+            return pd.DataFrame()
         
         if not dfs:
             print("No logs found.")
@@ -83,12 +95,9 @@ class PBPPlayerLogs(LogsEndpoint):
         return logs[self.expected_columns][::-1].reset_index(drop=True)
 
     def _lookup(self, name):
-        path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                            'data/player_ids.csv')
-        names_df = pd.read_csv(path)
-        
-        player = names_df[names_df["NAME"] == name]["NBA_ID"]
-        if len(player) == 0:
-            self.error = f"Player not found: `{name}`"
-            return
-        return player.iloc[0]
+        # Names that only match once normalized take the site's spelling, which the
+        # site's tables use
+        player, self.name, error = PlayerIndex.find(name, "NBA_ID")
+        if error is not None:
+            self.error = error
+        return player
@@ -1,13 +1,21 @@
 '''Player Stats Endpoint'''
-import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-from tqdm import tqdm
 
 from dans.endpoints._base import StatsEndpoint
 from dans.library.cache import Cache
+from dans.library.game_store import GameStore
+from dans.library.metrics import Metrics
 from dans.library.parameters import DataFormat
 from dans.library.pbp_processor import PBPProcessor
+from dans.library.pbp_schema import frames_digest
+from dans.library.prefetch import prefetch
+from dans.library.reference_data import ReferenceData
 from dans.library.pbp_counter import PBPCounter
+from dans.library.request.retry import RequestError
+from dans.library.request.response_cache import request_season
 from dans.library.stats_engine import StatsEngine
 
 class PBPPlayerStats(StatsEndpoint):
@@ -77,6 +85,13 @@ class PBPPlayerStats(StatsEndpoint):
         'GAMES',
     ]
 
+    # Number of upcoming games fetched while the current one is processed
+    prefetch_depth = 4
+
+    # Number of worker processes for games whose events are already in the `GameStore`,
+    # and how many games are sent to a worker at a time. `None` processes every game here.
+    processes = None
+    chunksize = 8
 
     def __init__(
         self,
@@ -91,10 +106,7 @@ class PBPPlayerStats(StatsEndpoint):
         self.adj_def = adj_def
         self.stats = {}
         
-        self.teams = pd.read_csv(os.path.join(os.path.dirname(os.path.dirname(
-            os.path.dirname(__file__))), "data/nba-stats-teams.csv"))
-        self.seasons = pd.read_csv(os.path.join(os.path.dirname(os.path.dirname(
-            os.path.dirname(__file__))), "data/season-averages.csv"))
+        self.teams, self.seasons = self._reference_tables()
 
         ids = player_logs["Player_ID"].unique().tolist()
         if len(ids) > 1:
@@ -105,6 +117,70 @@ class PBPPlayerStats(StatsEndpoint):
 
         self._iterate_through_games()
 
+    @classmethod
+    def load_games(cls, game_ids: list[str]) -> pd.DataFrame:
+        '''Processes each game once and counts the stats of every player who appeared in it.
+
+        Returns a row of `get_processed_logs()` columns for every player in every game, and
+        inserts the rows into the cache, so `PBPPlayerStats` for any of those players only
+        has to read the cache.
+        '''
+        teams, seasons = cls._reference_tables()
+        processor = PBPProcessor()
+        cache = Cache()
+
+        rows = []
+        failed_games = []
+        games = prefetch(processor.fetch, game_ids, cls.prefetch_depth)
+        iterator = Metrics.progress(games, "pbp_games", 'Loading play-by-plays...', len(game_ids))
+        try:
+            for game_id, fetched in iterator:
+                try:
+                    prepared = processor.prepare(game_id, fetched.result())
+                except RequestError:
+                    failed_games.append(game_id)
+                    continue
+
+                season = request_season({"args": {"game_id": game_id}})
+                for player_id in processor.players(prepared):
+                    rows.append(cls._game_stats(processor.for_player(prepared, player_id),
+                                                player_id, game_id, season, teams, seasons))
+        finally:
+            games.close()
+            if rows:
+                cache.insert_logs(cls._cache_rows(rows))
+
+        if failed_games:
+            print(f"Failed to load play-by-plays for games {failed_games}. Games that loaded " + \
+                  "are cached, so running this again only requests the missing ones.")
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows)[cls.expected_log_columns]
+
+    @classmethod
+    def fingerprint(cls) -> str:
+        '''Version of the code that computes each game's stats. Cached rows from any other
+        version are recomputed.'''
+        versions = {"processor": PBPProcessor.version, "counter": PBPCounter.version}
+        return hashlib.sha256(json.dumps(versions, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    @classmethod
+    def refresh_stale(cls, check_inputs: bool = False) -> pd.DataFrame:
+        '''Recomputes the cached games that have rows from another `fingerprint()`, with
+        `load_games`, and returns their new rows. With `check_inputs`, games whose frames
+        in the `GameStore` differ from the ones their rows were computed from are
+        recomputed as well.'''
+        inputs = None
+        if check_inputs:
+            store = GameStore()
+            inputs = {game_id: frames_digest(PBPProcessor().fetch(game_id))
+                      for game_id in Cache().game_ids() if store.contains(game_id)}
+
+        game_ids = sorted(Cache().stale(cls.fingerprint(), inputs)["GAME_ID"].unique())
+        if not game_ids:
+            return pd.DataFrame()
+        return cls.load_games(game_ids)
+
     def bball_ref(self):
         return NotImplementedError()
 
@@ -160,8 +236,9 @@ class PBPPlayerStats(StatsEndpoint):
         seasons = logs["SEASON"].to_list()
 
         # Check cache first
+        # Rows computed by other versions of the processing are recomputed
         cache = Cache()
-        cached_logs = cache.lookup_logs(self.player_id, game_ids)
+        cached_logs = cache.lookup_logs(self.player_id, game_ids, self.fingerprint())
         cached_game_ids = cached_logs["GAME_ID"].to_list() if not cached_logs.empty else []
 
         remaining_games = [game for game in zip(game_ids, seasons) if game[0] not in cached_game_ids]
@@ -169,30 +246,88 @@ class PBPPlayerStats(StatsEndpoint):
 
         if remaining_games:
             new_logs = []
-            iterator = tqdm(range(len(remaining_games)), desc='Loading play-by-plays...', ncols=75)
-            for i in iterator:
-                stats = self._player_game_stats(remaining_games[i][0], remaining_games[i][1])
-                new_logs.append(stats)
+            failed_games = []
 
-            # Convert new_logs to DataFrame only if not empty
-            if new_logs:
-                new_logs_df = pd.DataFrame(new_logs)[self.expected_log_columns].sort_values(by='GAME_ID')
+            # Stored games don't need requests, so they can be spread across processes
+            stored_games = []
+            if self.processes:
+                store = GameStore()
+                stored_games = [game for game in remaining_games if store.contains(game[0])]
+                remaining_games = [game for game in remaining_games if game not in stored_games]
+
+            # Upcoming games are fetched in worker threads while the current one is processed
+            games = prefetch(PBPProcessor().fetch, [game[0] for game in remaining_games],
+                             self.prefetch_depth)
+            iterator = Metrics.progress(zip(remaining_games, games), "pbp_games",
+                                        'Loading play-by-plays...', len(remaining_games))
+            try:
+                for (game_id, season), (_, fetched) in iterator:
+                    try:
+                        stats = self._player_game_stats(game_id, season, fetched.result())
+                    except RequestError:
+                        failed_games.append(game_id)
+                        continue
+                    new_logs.append(stats)
+
+                if stored_games:
+                    self._process_stored_games(stored_games, new_logs, failed_games)
+            finally:
+                games.close()
+                # Insert finished games to cache even if the loop is interrupted, so that
+                # running this again only processes the missing ones
+                if new_logs:
+                    new_logs_df = pd.DataFrame(new_logs)[self.expected_log_columns].sort_values(by='GAME_ID')
+                    cache.insert_logs(self._cache_rows(new_logs))
+
+            if failed_games:
+                print(f"Failed to load play-by-plays for games {failed_games}. Games that loaded " + \
+                      "are cached, so running this again only requests the missing ones.")
+                self.pbp_logs = pd.DataFrame()
+                return
 
         # Combine DataFrames, filtering out empty ones
         dfs_to_combine = [df for df in [new_logs_df, cached_logs] if not df.empty]
     
         self.pbp_logs = pd.concat(dfs_to_combine, ignore_index=True) if dfs_to_combine else pd.DataFrame()
-        # Insert logs to cache
-        cache.insert_logs(self.pbp_logs)
 
-    def _player_game_stats(self, game_id: str, season: int) -> dict:
+    def _process_stored_games(self, games: list[tuple], new_logs: list, failed_games: list):
+        """Processes stored games in `processes` worker processes. Results come back in
+        the order of `games`, whichever worker finishes first."""
+
+        tasks = [(game_id, season, self.player_id) for game_id, season in games]
+        with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                 initargs=(self.teams, self.seasons, GameStore.path)) as executor:
+            results = executor.map(_stored_game_stats, tasks, chunksize=self.chunksize)
+            iterator = Metrics.progress(zip(games, results), "pbp_stored_games",
+                                        'Processing stored play-by-plays...', len(games))
+            for (game_id, _), stats in iterator:
+                if stats is None:
+                    failed_games.append(game_id)
+                else:
+                    new_logs.append(stats)
+
+    @classmethod
+    def _cache_rows(cls, rows: list[dict]) -> pd.DataFrame:
+        '''Rows to cache, with the version and raw frames they were computed from'''
+        return pd.DataFrame(rows)[cls.expected_log_columns + ["INPUTS"]]\
+            .assign(VERSION=cls.fingerprint()).sort_values(by='GAME_ID')
+
+    def _player_game_stats(self, game_id: str, season: int, game: dict = None) -> dict:
         
         processor = PBPProcessor()
-        pbp_data =  processor.process(game_id, self.player_id)
+        pbp_data =  processor.process(game_id, self.player_id, game)
+        return self._game_stats(pbp_data, self.player_id, game_id, season, self.teams, self.seasons)
+
+    @classmethod
+    def _reference_tables(cls) -> tuple[pd.DataFrame, pd.DataFrame]:
+        return ReferenceData.table("nba_stats_teams"), ReferenceData.table("season_averages")
+
+    @staticmethod
+    def _game_stats(pbp_data: dict, player_id: int, game_id: str, season: int,
+                    teams: pd.DataFrame, seasons: pd.DataFrame) -> dict:
         
         all_logs = pbp_data["all_logs"]
-        pbp_v3 = pbp_data["pbp_v3"]
-        pbp_v2 = pbp_data["pbp_v2"]
+        events = pbp_data["events"]
         team_id = pbp_data["team_id"]
         team_name = pbp_data["team_name"]
         opp_tricode = pbp_data["opp_tricode"]
@@ -200,17 +335,38 @@ class PBPPlayerStats(StatsEndpoint):
         counter = PBPCounter()
 
         stats = {
-            "PLAYER_ID": self.player_id,
+            "PLAYER_ID": player_id,
             "SEASON": season,
-            "GAME_ID": game_id
+            "GAME_ID": game_id,
+            "INPUTS": pbp_data["inputs"]
         }
 
-        box_stats = counter.count_stats(pbp_v3, pbp_v2, self.player_id)
-        poss_stats = counter.count_possessions(all_logs, pbp_v3, team_name, team_id)
-        opp_stats = counter.count_opp_stats(self.teams, self.seasons, season, opp_tricode)
+        with Metrics.timer("count", game_id=game_id, player_id=int(player_id)):
+            box_stats = counter.count_stats(events, player_id)
+            poss_stats = counter.count_possessions(all_logs, events, team_name, team_id)
+            opp_stats = counter.count_opp_stats(teams, seasons, season, opp_tricode)
 
         stats.update(box_stats)
         stats.update(poss_stats)
         stats.update(opp_stats)
 
         return stats
+
+# Reference tables of a worker process, set once when the process starts
+_worker = {}
+
+def _init_worker(teams: pd.DataFrame, seasons: pd.DataFrame, game_store_path: str):
+    _worker["teams"] = teams
+    _worker["seasons"] = seasons
+    GameStore.configure(path=game_store_path)
+    Metrics.reopen()
+
+def _stored_game_stats(task: tuple) -> dict:
+    """Stats of a player in a stored game, or None if the game couldn't be loaded"""
+    game_id, season, player_id = task
+    try:
+        pbp_data = PBPProcessor().process(game_id, player_id)
+    except RequestError:
+        return None
+    return PBPPlayerStats._game_stats(pbp_data, player_id, game_id, season,
+                                      _worker["teams"], _worker["seasons"])
@@ -1,10 +1,11 @@
 """Box score possession counter"""
 from abc import ABC, abstractmethod
 import pandas as pd
-from tqdm import tqdm
 
+from dans.library.metrics import Metrics
 from dans.library.parameters import SeasonType
 from dans.library.request.request import Request
+from dans.library.season_snapshots import SeasonSnapshotStore
 
 class PossCount(ABC):
     
@@ -12,96 +13,177 @@ class PossCount(ABC):
     def count(self, logs: pd.DataFrame):
         pass
 
+    @abstractmethod
+    async def count_async(self, logs: pd.DataFrame):
+        pass
+
+    def _unit(self, season: pd.Series) -> str:
+        # Row of `_pace_list`, without its game count
+        return " ".join(str(value) for value in season.drop(0))
+
+    def _failed(self, units: list[str]):
+        # Every other season was still requested, and the ones that loaded are cached
+        print(f"Failed to load possessions for {units}. Seasons that loaded are cached, " + \
+              "so running this again only requests the missing ones.")
+        return pd.DataFrame()
+
 class BBallRefPossCount(PossCount):
     
     def count(self, logs: pd.DataFrame):
         
-        pace_list = pd.DataFrame(logs.groupby(['SEASON', 'SEASON_TYPE', 'TEAM'])
-                                 .size().reset_index())
+        pace_list = self._pace_list(logs)
 
-        iterator = tqdm(range(len(pace_list)),
-                        desc='Loading player possessions...', ncols=75, leave=False)
+        iterator = Metrics.progress(range(len(pace_list)), "player_possessions",
+                                    'Loading player possessions...')
 
         poss_list = []
+        failed = []
         for i in iterator:
-            year = pace_list.loc[i]["SEASON"]
-            team = pace_list.loc[i]["TEAM"]
-            season_type = pace_list.loc[i]["SEASON_TYPE"]
-            url = f'https://www.basketball-reference.com/teams/{team}/{year}/gamelog-advanced/'
-
-            if season_type == SeasonType.regular_season:
-                attr_id = "team_game_log_adv_reg"
-            else:
-                attr_id = "team_game_log_adv_post"
-
-            adv_log_pd = Request(url=url, attr_id={"id": attr_id}).get_response()
-
+            adv_log_pd = self._request(pace_list.loc[i]).get_response()
             if adv_log_pd.empty:
-                return pd.DataFrame()
+                failed.append(self._unit(pace_list.loc[i]))
+                continue
 
-            if 'Pace' not in adv_log_pd.columns:
+            poss_df = self._merge(logs, adv_log_pd, pace_list.loc[i])
+
+            if poss_df is None:
                 for _ in iterator:
                     pass
-
-                print("Failed to estimate player possessions. Pace was not tracked " + \
-                         f"during the {year} {season_type}")
                 return pd.DataFrame()
 
-            adv_log_pd = adv_log_pd\
-                .iloc[:, [i for i in range(len(adv_log_pd.columns)) if i != 6]]\
-                .rename(columns={
-                    "Date": "GAME_DATE",
-                    "Opp": "MATCHUP"
-                })
+            poss_list.append(poss_df)
 
-            poss_df = pd.merge(logs, adv_log_pd, on=["GAME_DATE", "MATCHUP"], how="inner")
+        if failed:
+            return self._failed(failed)
+        return pd.concat(poss_list)
 
-            if (poss_df["Pace"] == "").any():
+    async def count_async(self, logs: pd.DataFrame):
+        '''Same as `count`, but requests every team season concurrently.'''
 
-                for _ in iterator:
-                    pass
+        pace_list = self._pace_list(logs)
 
-                print('Failed to estimate player possessions. At least one of the ' + \
-                         'games does not track pace.')
-                return pd.DataFrame()
+        adv_logs = await Metrics.gather(
+            *(self._request(pace_list.loc[i]).get_response_async() for i in range(len(pace_list))),
+            stage="player_possessions", desc='Loading player possessions...')
+
+        failed = [self._unit(pace_list.loc[i]) for i, adv_log_pd in enumerate(adv_logs)
+                  if adv_log_pd.empty]
+        if failed:
+            return self._failed(failed)
 
-            poss_df["POSS"] = ( poss_df["MIN"].astype(float) / 48 ) * \
-                poss_df["Pace"].astype(float)
-            
+        poss_list = []
+        for i, adv_log_pd in enumerate(adv_logs):
+            poss_df = self._merge(logs, adv_log_pd, pace_list.loc[i])
+            if poss_df is None:
+                return pd.DataFrame()
             poss_list.append(poss_df)
 
         return pd.concat(poss_list)
 
+    def _pace_list(self, logs: pd.DataFrame) -> pd.DataFrame:
+        return pd.DataFrame(logs.groupby(['SEASON', 'SEASON_TYPE', 'TEAM'])
+                            .size().reset_index())
+
+    def _request(self, team_season: pd.Series) -> Request:
+        year = team_season["SEASON"]
+        team = team_season["TEAM"]
+        url = f'https://www.basketball-reference.com/teams/{team}/{year}/gamelog-advanced/'
+
+        if team_season["SEASON_TYPE"] == SeasonType.regular_season:
+            attr_id = "team_game_log_adv_reg"
+        else:
+            attr_id = "team_game_log_adv_post"
+
+        return Request(url=url, attr_id={"id": attr_id})
+
+    def _merge(self, logs: pd.DataFrame, adv_log_pd: pd.DataFrame, team_season: pd.Series):
+        """Player possessions for one team season, or None if they can't be estimated"""
+
+        if adv_log_pd.empty:
+            return None
+
+        if 'Pace' not in adv_log_pd.columns:
+            print("Failed to estimate player possessions. Pace was not tracked " + \
+                     f"during the {team_season['SEASON']} {team_season['SEASON_TYPE']}")
+            return None
+
+        adv_log_pd = adv_log_pd\
+            .iloc[:, [i for i in range(len(adv_log_pd.columns)) if i != 6]]\
+            .rename(columns={
+                "Date": "GAME_DATE",
+                "Opp": "MATCHUP"
+            })
+
+        poss_df = pd.merge(logs, adv_log_pd, on=["GAME_DATE", "MATCHUP"], how="inner")
+
+        if (poss_df["Pace"] == "").any():
+            print('Failed to estimate player possessions. At least one of the ' + \
+                     'games does not track pace.')
+            return None
+
+        poss_df["POSS"] = ( poss_df["MIN"].astype(float) / 48 ) * \
+            poss_df["Pace"].astype(float)
+
+        return poss_df
+
 class NBAStatsPossCount(PossCount):
 
     def count(self, logs: pd.DataFrame):
 
-        pace_list = pd.DataFrame(logs.groupby(['SEASON', 'SEASON_TYPE'])
-                                 .size().reset_index())
+        pace_list = self._pace_list(logs)
 
-        iterator = tqdm(range(len(pace_list)),
-                        desc='Loading player possessions...', ncols=75, leave=False)
+        iterator = Metrics.progress(range(len(pace_list)), "player_possessions",
+                                    'Loading player possessions...')
 
         poss_list = []
+        failed = []
         for i in iterator:
-            year = pace_list.loc[i]["SEASON"]
-            season_type = pace_list.loc[i]["SEASON_TYPE"]
-            url = 'https://stats.nba.com/stats/playergamelogs'
-            adv_log_pd = Request(
-                url=url,
-                year=year,
-                season_type=season_type,
-                measure_type="Advanced"
-            ).get_response()
+            adv_log_pd = self._snapshot(pace_list.loc[i])
             if adv_log_pd.empty:
-                return None
+                failed.append(self._unit(pace_list.loc[i]))
+                continue
 
-            adv_log_pd = adv_log_pd.query('PLAYER_NAME == @logs.iloc[0]["PLAYER_NAME"]')\
-                .iloc[:, [i for i in range(len(adv_log_pd.columns)) if i != 11]]
-            
-            adv_log_pd["GAME_DATE"] = adv_log_pd["GAME_DATE"].str[:10]
-
-            poss_df = pd.merge(logs, adv_log_pd, on=["GAME_DATE"], how="inner")
-            poss_list.append(poss_df)
+            poss_list.append(self._merge(logs, adv_log_pd))
 
+        if failed:
+            return self._failed(failed)
         return pd.concat(poss_list)
+
+    async def count_async(self, logs: pd.DataFrame):
+        '''Same as `count`, but requests every season concurrently.'''
+
+        pace_list = self._pace_list(logs)
+
+        adv_logs = await Metrics.gather(
+            *(self._snapshot_async(pace_list.loc[i]) for i in range(len(pace_list))),
+            stage="player_possessions", desc='Loading player possessions...')
+
+        failed = [self._unit(pace_list.loc[i]) for i, adv_log_pd in enumerate(adv_logs)
+                  if adv_log_pd.empty]
+        if failed:
+            return self._failed(failed)
+
+        return pd.concat([self._merge(logs, adv_log_pd) for adv_log_pd in adv_logs])
+
+    def _pace_list(self, logs: pd.DataFrame) -> pd.DataFrame:
+        return pd.DataFrame(logs.groupby(['SEASON', 'SEASON_TYPE'])
+                            .size().reset_index())
+
+    # Columns of the league-wide advanced tables that possessions are read from
+    columns = ["PLAYER_NAME", "GAME_DATE", "POSS"]
+
+    def _snapshot(self, season: pd.Series) -> pd.DataFrame:
+        return SeasonSnapshotStore().get(season["SEASON"], season["SEASON_TYPE"],
+                                         measure_type="Advanced", columns=self.columns)
+
+    async def _snapshot_async(self, season: pd.Series) -> pd.DataFrame:
+        return await SeasonSnapshotStore().get_async(season["SEASON"], season["SEASON_TYPE"],
+                                                     measure_type="Advanced", columns=self.columns)
+
+    def _merge(self, logs: pd.DataFrame, adv_log_pd: pd.DataFrame) -> pd.DataFrame:
+        adv_log_pd = adv_log_pd.query('PLAYER_NAME == @logs.iloc[0]["PLAYER_NAME"]')\
+            .drop(columns=["PLAYER_NAME"])
+        
+        adv_log_pd["GAME_DATE"] = adv_log_pd["GAME_DATE"].dt.strftime('%Y-%m-%d')
+
+        return pd.merge(logs, adv_log_pd, on=["GAME_DATE"], how="inner")
@@ -3,16 +3,210 @@ Cache
 """
 
 import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
 
+from dans.library.metrics import Metrics
+from dans.library.storage import cache_dir
+
+# Columns of the cached logs and their SQLite types
+COLUMNS = {
+    "PLAYER_ID": "INTEGER",
+    "SEASON": "INTEGER",
+    "GAME_ID": "TEXT",
+    "PTS": "REAL",
+    "FGM": "INTEGER",
+    "FGA": "INTEGER",
+    "FG3M": "INTEGER",
+    "FG3A": "INTEGER",
+    "FTM": "INTEGER",
+    "FTA": "INTEGER",
+    "REB": "INTEGER",
+    "AST": "INTEGER",
+    "STL": "INTEGER",
+    "BLK": "INTEGER",
+    "TOV": "INTEGER",
+    "STOV": "INTEGER",
+    "TEAM_POSS": "REAL",
+    "PLAYER_POSS": "REAL",
+    "OPP_TS": "REAL",
+    "OPP_ADJ_TS": "REAL",
+    "OPP_TSC": "REAL",
+    "OPP_STOV": "REAL",
+    "DRTG": "REAL",
+    "ADJ_DRTG": "REAL",
+    "LA_PACE": "REAL",
+    "rDRTG": "REAL",
+    "rADJ_DRTG": "REAL"
+}
+DTYPES = {"INTEGER": "int64", "TEXT": "object", "REAL": "float64"}
+
+# Columns that record how each row was computed: the fingerprint of the code that
+# computed it, and the digest of the raw frames it was computed from
+META_COLUMNS = {
+    "VERSION": "TEXT",
+    "INPUTS": "TEXT"
+}
+
 class Cache:
+    """Play-by-play stats of each player in each game, in an SQLite table whose primary
+    key is (PLAYER_ID, GAME_ID). Lookups use the key's index, and inserts only write the
+    new rows, replacing any row with the same key.
+
+    Each row can record the `VERSION` of the code that computed it and the digest of the
+    raw `INPUTS` it was computed from. Lookups for a version skip rows from any other
+    version, so they are recomputed, and `stale` lists them for recomputing ahead of time.
+
+    The database is opened on first use, and created empty if it doesn't exist yet.
+    Several processes can share it: it is kept in write-ahead-log mode, so readers don't
+    block the writer, and every insert is one transaction that waits up to `timeout`
+    seconds for other writers.
+    """
 
-    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data/cache.csv')
-    logs = pd.read_csv(path, dtype={"GAME_ID": "str"}).reset_index(drop=True)
+    path = os.path.join(cache_dir(), "cache.sqlite")
+    table = "logs"
+
+    # Variables per statement, below SQLite's limit
+    batch_size = 500
+    timeout = 60.0
+
+    _connections = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, path: str = None, timeout: float = None):
+        if path is not None:
+            cls.path = path
+        if timeout is not None:
+            cls.timeout = timeout
 
     def insert_logs(self, new_logs: pd.DataFrame):
-        self.logs = pd.concat([self.logs, new_logs]).drop_duplicates(subset=["PLAYER_ID", "GAME_ID"]).reset_index(drop=True) if not self.logs.empty else new_logs
-        self.logs.to_csv(self.path, index=False)
+        with Metrics.timer("cache_insert", rows=len(new_logs)):
+            self._insert_logs(new_logs)
+
+    def lookup_logs(self, player_id: int, game_ids: list[str], version: str = None) -> pd.DataFrame:
+        """Cached logs of a player in `game_ids`, ordered by GAME_ID. If `version` is given,
+        rows computed by any other version are left out."""
+        with Metrics.timer("cache_lookup", games=len(game_ids)) as fields:
+            logs = self._lookup_logs(player_id, game_ids, version)
+            fields["rows"] = len(logs)
+        return logs
+
+    def game_ids(self) -> list[str]:
+        """Every cached GAME_ID"""
+        with self._lock:
+            rows = self._connect().execute(f"SELECT DISTINCT GAME_ID FROM {self.table}").fetchall()
+        return sorted(row[0] for row in rows)
+
+    def stale(self, version: str, inputs: dict = None) -> pd.DataFrame:
+        """PLAYER_ID, SEASON and GAME_ID of rows that weren't computed by `version`, or that
+        were computed from other raw frames than the digests in `inputs` (by GAME_ID)"""
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT PLAYER_ID, SEASON, GAME_ID, VERSION, INPUTS FROM {self.table}").fetchall()
+        rows = pd.DataFrame.from_records(rows, columns=["PLAYER_ID", "SEASON", "GAME_ID", "VERSION", "INPUTS"])
+        stale = rows["VERSION"] != version
+        if inputs:
+            current = rows["GAME_ID"].map(inputs)
+            stale |= current.notna() & (rows["INPUTS"] != current)
+        return rows.loc[stale, ["PLAYER_ID", "SEASON", "GAME_ID"]].reset_index(drop=True)
+
+    def _insert_logs(self, new_logs: pd.DataFrame):
+        if new_logs.empty:
+            return
+        with self._lock:
+            connection = self._connect()
+            with _transaction(connection):
+                self._insert(connection, new_logs)
+
+    def _lookup_logs(self, player_id: int, game_ids: list[str], version: str = None) -> pd.DataFrame:
+        game_ids = list(dict.fromkeys(str(game_id) for game_id in game_ids))
+        condition, version_params = ("AND VERSION = ?", [version]) if version is not None else ("", [])
+        rows = []
+        with self._lock:
+            connection = self._connect()
+            for i in range(0, len(game_ids), self.batch_size):
+                batch = game_ids[i:i + self.batch_size]
+                rows += connection.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM {self.table} "
+                    f"WHERE PLAYER_ID = ? AND GAME_ID IN ({', '.join('?' * len(batch))}) {condition}",
+                    [int(player_id), *batch, *version_params]).fetchall()
+        # Ordered by GAME_ID
+        rows.sort(key=lambda row: row[2])
+        return _frame(rows)
+
+    @classmethod
+    def _connect(cls) -> sqlite3.Connection:
+        """Connection of this process to the database at `path`, created on first use"""
+        key = (cls.path, os.getpid())
+        connection = cls._connections.get(key)
+        if connection is None:
+            os.makedirs(os.path.dirname(cls.path), exist_ok=True)
+            # Transactions are started explicitly, see `_transaction`
+            connection = sqlite3.connect(cls.path, timeout=cls.timeout, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            cls._create(connection)
+            cls._connections[key] = connection
+        return connection
+
+    @classmethod
+    def _create(cls, connection: sqlite3.Connection):
+        """Creates the table, unless another process already did"""
+        columns = ", ".join(f"{column} {kind}" for column, kind in {**COLUMNS, **META_COLUMNS}.items())
+        with _transaction(connection):
+            exists = connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                        (cls.table,)).fetchone()
+            if exists:
+                # Tables created before rows were versioned get the new columns, empty
+                existing = {row[1] for row in connection.execute(f"PRAGMA table_info({cls.table})")}
+                for column, kind in META_COLUMNS.items():
+                    if column not in existing:
+                        connection.execute(f"ALTER TABLE {cls.table} ADD COLUMN {column} {kind}")
+                return
+            connection.execute(f"CREATE TABLE {cls.table} ({columns}, "
+                               "PRIMARY KEY (PLAYER_ID, GAME_ID)) WITHOUT ROWID")
+
+    @classmethod
+    def _insert(cls, connection: sqlite3.Connection, logs: pd.DataFrame):
+        """Inserts every row of `logs`, replacing rows whose key is already in the table"""
+        columns = [column for column in {**COLUMNS, **META_COLUMNS} if column in logs.columns]
+        values = logs[columns].astype(object).where(logs[columns].notna(), None)
+        connection.executemany(
+            f"INSERT OR REPLACE INTO {cls.table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})",
+            [tuple(_python(value) for value in row) for row in values.itertuples(index=False, name=None)])
+
+@contextmanager
+def _transaction(connection: sqlite3.Connection):
+    """Write transaction that takes the database's write lock at once, so two processes
+    never both read and then wait on each other to write. Rolled back on errors."""
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+def _python(value):
+    # sqlite3 only binds python scalars
+    return value.item() if hasattr(value, "item") else value
+
+def _frame(rows: list[tuple]) -> pd.DataFrame:
+    # Transpose once, then build every column straight into its dtype. NULLs become NaN,
+    # so INTEGER columns with NULLs are float64, as `read_csv` reads them.
+    values = list(zip(*rows)) if rows else [()] * len(COLUMNS)
+    return pd.DataFrame({
+        column: np.array(column_values, dtype=_dtype(kind, column_values))
+        for (column, kind), column_values in zip(COLUMNS.items(), values)
+    })
 
-    def lookup_logs(self, player_id: int, game_ids: list[str]) -> pd.DataFrame:
-        return self.logs[(self.logs["PLAYER_ID"] == player_id) & (self.logs["GAME_ID"].isin(game_ids))].copy()
+def _dtype(kind: str, values: tuple) -> str:
+    if kind == "INTEGER" and None in values:
+        return "float64"
+    return DTYPES[kind]
@@ -0,0 +1,89 @@
+"""Raw play-by-play frames of finished games"""
+import os
+import json
+import pandas as pd
+import pyarrow as pa
+
+from dans.library.metrics import Metrics
+from dans.library.storage import atomic_write, cache_dir
+from dans.library.request.response_cache import current_season, request_season
+
+class GameStore:
+    """Stores the play-by-play events (PlayByPlayV3 merged with PlayByPlayV2) and
+    GameRotation frames of a game as compressed Parquet files, keyed by GAME_ID and
+    shared by every player in the game.
+
+    Only finished games are stored, since they never change: games from past seasons,
+    and games whose play-by-play ends with a final 4th period or overtime.
+    """
+
+    enabled = True
+    path = os.path.join(cache_dir(), "games")
+    compression = "zstd"
+    manifest_file = "frames.json"
+
+    @classmethod
+    def configure(cls, enabled: bool = None, path: str = None):
+        if enabled is not None:
+            cls.enabled = enabled
+        if path is not None:
+            cls.path = path
+
+    def contains(self, game_id: str) -> bool:
+        return self.enabled and os.path.exists(os.path.join(self.path, game_id, self.manifest_file))
+
+    def get(self, game_id: str) -> dict:
+        """Frames of each endpoint for a stored game, or None"""
+        if not self.enabled:
+            return None
+        directory = os.path.join(self.path, game_id)
+        with Metrics.timer("game_store_get", game_id=game_id) as fields:
+            try:
+                with open(os.path.join(directory, self.manifest_file), "r", encoding="utf-8") as file:
+                    manifest = json.load(file)
+            except FileNotFoundError:
+                fields["hit"] = False
+                return None
+            fields["hit"] = True
+            return {
+                endpoint: [pd.read_parquet(os.path.join(directory, name)) for name in names]
+                for endpoint, names in manifest.items()
+            }
+
+    def put(self, game_id: str, game: dict):
+        """Stores the frames of each endpoint (`{"PlayByPlay": [...], ...}`) if the game is finished"""
+        if not self.enabled or not self.is_finished(game_id, game):
+            return
+        directory = os.path.join(self.path, game_id)
+        manifest = {}
+        try:
+            for endpoint, frames in game.items():
+                manifest[endpoint] = []
+                for i, frame in enumerate(frames):
+                    name = f"{endpoint}_{i}.parquet"
+                    atomic_write(os.path.join(directory, name), lambda tmp_path, frame=frame:
+                                 frame.to_parquet(tmp_path, index=False, compression=self.compression))
+                    manifest[endpoint].append(name)
+        except (pa.ArrowException, ValueError):
+            # Frames that Parquet can't represent are simply not stored
+            return
+
+        # The manifest is written last, so a game only counts as stored once every frame is
+        atomic_write(os.path.join(directory, self.manifest_file),
+                     lambda tmp_path: _write_json(tmp_path, manifest))
+
+    def is_finished(self, game_id: str, game: dict) -> bool:
+        season = request_season({"args": {"game_id": game_id}})
+        if season is not None and season < current_season():
+            return True
+
+        events = game.get("PlayByPlay")
+        if not events or events[0].empty:
+            return False
+        last = events[0].iloc[-1]
+        return last.get("actionType") == "period" and last.get("subType") == "end" and \
+            int(last.get("period", 0)) >= 4 and str(last.get("scoreHome")) != str(last.get("scoreAway"))
+
+def _write_json(path: str, value):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(value, file)
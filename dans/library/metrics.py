@@ -0,0 +1,197 @@
+"""Instrumentation of the pipeline's stages"""
+import json
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+import pandas as pd
+from tqdm import tqdm
+
+class MemorySink:
+    """Keeps every event in a list"""
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+
+    def __call__(self, event: dict):
+        with self._lock:
+            self.events.append(event)
+
+    def clear(self):
+        with self._lock:
+            self.events = []
+
+    def summary(self) -> pd.DataFrame:
+        """Calls, total/mean/max seconds and failures of each stage"""
+        stages = pd.DataFrame([event for event in self.events if event["type"] == "stage"])
+        if stages.empty:
+            return pd.DataFrame()
+        return stages.groupby("stage").agg(
+            CALLS=("seconds", "size"),
+            SECONDS=("seconds", "sum"),
+            MEAN=("seconds", "mean"),
+            MAX=("seconds", "max"),
+            FAILED=("failed", "sum")
+        ).sort_values(by="SECONDS", ascending=False)
+
+    def counts(self) -> pd.Series:
+        """Total of each counter"""
+        counts = pd.DataFrame([event for event in self.events if event["type"] == "count"])
+        if counts.empty:
+            return pd.Series(dtype=float)
+        return counts.groupby("name")["value"].sum()
+
+class JSONLinesSink:
+    """Appends every event to a file as a line of JSON"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def __call__(self, event: dict):
+        line = json.dumps(event, default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def reopen(self):
+        """Opens the file again in a forked process, instead of sharing the parent's"""
+        self._lock = threading.Lock()
+        self._file = None
+
+class ProgressBars:
+    """Shows progress events as progress bars and ignores every other event"""
+
+    def __init__(self):
+        self._bars = {}
+        self._lock = threading.Lock()
+
+    def reopen(self):
+        """Forgets the parent's bars in a forked process"""
+        self._bars = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: dict):
+        if event["type"] != "progress":
+            return
+        with self._lock:
+            key = (event["stage"], event["id"])
+            bar = self._bars.get(key)
+            if bar is None:
+                bar = self._bars[key] = tqdm(total=event["total"], desc=event["desc"], ncols=75,
+                                             leave=False)
+            bar.update(event["done"] - bar.n)
+            if event["finished"]:
+                bar.close()
+                del self._bars[key]
+
+class Metrics:
+    """Sends timing, count and progress events of the pipeline's stages to a sink.
+
+    A sink is any callable that takes an event `dict`, or a list of them. Every event has
+    a `type` (`"stage"`, `"count"` or `"progress"`), a `stage` or counter `name` and the
+    `time` it was sent. Stage events hold the wall time in `seconds` and whether the stage
+    `failed`. By default, progress events are shown as progress bars.
+    """
+
+    enabled = True
+    sink = ProgressBars()
+
+    _progress_ids = iter(range(1 << 62))
+
+    @classmethod
+    def configure(cls, sink=None, enabled: bool = None):
+        if sink is not None:
+            cls.sink = sink
+        if enabled is not None:
+            cls.enabled = enabled
+
+    @classmethod
+    def reopen(cls):
+        """Reopens the sinks in a worker process, which may have been forked with the
+        parent's open files"""
+        sinks = cls.sink if isinstance(cls.sink, (list, tuple)) else [cls.sink]
+        for sink in sinks:
+            if hasattr(sink, "reopen"):
+                sink.reopen()
+
+    @classmethod
+    def emit(cls, event: dict):
+        if not cls.enabled:
+            return
+        event["time"] = time.time()
+        sinks = cls.sink if isinstance(cls.sink, (list, tuple)) else [cls.sink]
+        for sink in sinks:
+            sink(event)
+
+    @classmethod
+    @contextmanager
+    def timer(cls, stage: str, **fields):
+        """Times the block as `stage`. Yields `fields`, so the block can add to the event."""
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield fields
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            cls.record(stage, time.perf_counter() - start, failed, **fields)
+
+    @classmethod
+    def record(cls, stage: str, seconds: float, failed: bool = False, **fields):
+        """Sends a stage event for time that was measured elsewhere"""
+        cls.emit({"type": "stage", "stage": stage, "seconds": seconds, "failed": failed, **fields})
+
+    @classmethod
+    def count(cls, name: str, value: float = 1, **fields):
+        cls.emit({"type": "count", "name": name, "value": value, **fields})
+
+    @classmethod
+    def progress(cls, iterable, stage: str, desc: str, total: int = None):
+        """Yields the items of `iterable`, sending a progress event after each one"""
+        total = len(iterable) if total is None else total
+        progress_id = next(cls._progress_ids)
+        done = 0
+        cls._progress(stage, progress_id, desc, done, total, False)
+        try:
+            for item in iterable:
+                yield item
+                done += 1
+                cls._progress(stage, progress_id, desc, done, total, False)
+        finally:
+            cls._progress(stage, progress_id, desc, done, total, True)
+
+    @classmethod
+    async def gather(cls, *aws, stage: str, desc: str) -> list:
+        """`asyncio.gather` that sends a progress event as each awaitable finishes"""
+        progress_id = next(cls._progress_ids)
+        done = 0
+        cls._progress(stage, progress_id, desc, done, len(aws), False)
+
+        async def tracked(aw):
+            nonlocal done
+            result = await aw
+            done += 1
+            cls._progress(stage, progress_id, desc, done, len(aws), False)
+            return result
+
+        try:
+            return await asyncio.gather(*(tracked(aw) for aw in aws))
+        finally:
+            cls._progress(stage, progress_id, desc, done, len(aws), True)
+
+    @classmethod
+    def _progress(cls, stage: str, progress_id: int, desc: str, done: int, total: int, finished: bool):
+        cls.emit({"type": "progress", "stage": stage, "id": progress_id, "desc": desc,
+                  "done": done, "total": total, "finished": finished})
@@ -3,7 +3,10 @@ nba_api Client
 """
 import pandas as pd
 
+from dans.library.game_store import GameStore
+from dans.library.pbp_schema import compact_events, compact_rotations
 from dans.library.request.request import Request
+from dans.library.request.retry import RequestError, RetryPolicy
 from nba_api.stats.endpoints.playbyplayv3 import PlayByPlayV3
 from nba_api.stats.endpoints.playbyplayv2 import PlayByPlayV2
 from nba_api.stats.endpoints.gamerotation import GameRotation
@@ -13,22 +16,72 @@ class NBAApiClient:
     """Wrapper for nba_api calls"""
     
     def get_player_game_log(self, player_id, season: str, season_type: str) -> pd.DataFrame:
-        return pd.concat(Request(function=PlayerGameLog, args={
+        return pd.concat(self._data_frames(Request(function=PlayerGameLog, args={
             "player_id": player_id,
             "season": season,
             "season_type_all_star": season_type
-        }).get_response().get_data_frames())
+        })))
     
-    def get_play_by_play_v3(self, game_id: str) -> pd.DataFrame:
-        return pd.concat(self._get_endpoint_game_id_only(game_id, PlayByPlayV3))
+    game_endpoints = [PlayByPlayV3, PlayByPlayV2, GameRotation]
 
-    def get_play_by_play_v2(self, game_id: str) -> pd.DataFrame:
-        return pd.concat(self._get_endpoint_game_id_only(game_id, PlayByPlayV2))
+    # Columns of PlayByPlayV2 that are joined onto PlayByPlayV3 events
+    v2_columns = [
+        'EVENTNUM',
+        'HOMEDESCRIPTION',
+        'VISITORDESCRIPTION',
+        'PLAYER1_ID',
+        'PLAYER2_ID',
+        'PLAYER3_ID'
+    ]
 
-    def get_rotations(self, game_id: str) -> pd.DataFrame:
-        return self._get_endpoint_game_id_only(game_id, GameRotation)
+    def get_game(self, game_id: str) -> dict:
+        """Play-by-play events and rotation frames of a game, with the columns and dtypes
+        of `pbp_schema`. Finished games are kept in the `GameStore`, so they are only
+        requested once."""
+        store = GameStore()
+        game = store.get(game_id)
+        if game is None:
+            frames = {endpoint.__name__: self._request_endpoint(game_id, endpoint)
+                      for endpoint in self.game_endpoints}
+            game = {
+                "PlayByPlay": [self.merge_play_by_play(frames["PlayByPlayV3"][0],
+                                                       frames["PlayByPlayV2"][0])],
+                "GameRotation": compact_rotations(frames["GameRotation"])
+            }
+            store.put(game_id, game)
+        elif "PlayByPlay" not in game:
+            # Stored before events were merged
+            game["PlayByPlay"] = [self.merge_play_by_play(game["PlayByPlayV3"][0],
+                                                          game["PlayByPlayV2"][0])]
+        # Games stored before frames were compacted are compacted on read
+        return {
+            "events": compact_events(game["PlayByPlay"][0]),
+            "rotations": compact_rotations(game["GameRotation"])
+        }
 
-    def _get_endpoint_game_id_only(self, game_id: str, endpoint) -> pd.DataFrame:
-        return Request(function=endpoint, args={
+    def merge_play_by_play(self, pbp_v3: pd.DataFrame, pbp_v2: pd.DataFrame) -> pd.DataFrame:
+        """PlayByPlayV3 events, with the descriptions and player roles of the PlayByPlayV2
+        event that has the same number. V3 splits some events (e.g. a shot and its block)
+        into several rows, so only the first row of each event gets the V2 columns.
+        Only the columns of `pbp_schema.EVENT_DTYPES` are kept."""
+        events = pbp_v3.reset_index(drop=True)
+        numbers = events["actionNumber"].where(~events["actionNumber"].duplicated())
+
+        pbp_v2 = pbp_v2.reindex(columns=self.v2_columns).dropna(subset=["EVENTNUM"])
+        pbp_v2 = pbp_v2.drop_duplicates("EVENTNUM").set_index("EVENTNUM", drop=False)
+        merged = pbp_v2.reindex(numbers.to_numpy())
+        for column in self.v2_columns:
+            events[column] = merged[column].to_numpy()
+        return compact_events(events)
+
+    def _request_endpoint(self, game_id: str, endpoint) -> list[pd.DataFrame]:
+        return self._data_frames(Request(function=endpoint, args={
             "game_id": game_id
-        }).get_response().get_data_frames()
+        }))
+
+    def _data_frames(self, request: Request) -> list[pd.DataFrame]:
+        """Frames of an endpoint's response. Raises a `RequestError` if the request failed."""
+        response = request.get_response()
+        if request.error is not None:
+            raise RequestError(str(request.error), transient=RetryPolicy.is_transient(request.error))
+        return response.get_data_frames()
@@ -36,3 +36,15 @@ class Site:
     nba_stats = "NBA Stats"
 
     default = basketball_reference
+
+@dataclass
+class TransportMode:
+    '''
+    Class for choosing how requests reach the network.
+    '''
+
+    off = "off"
+    record = "record"
+    replay = "replay"
+
+    default = off
@@ -0,0 +1,129 @@
+"""
+Play-by-play event classification shared by the counters
+"""
+import numpy as np
+import pandas as pd
+
+# Bits of the `events` column taken from the V3 columns of an event
+FGA = 1 << 0
+FGM = 1 << 1
+FG3A = 1 << 2
+FG3M = 1 << 3
+FTA = 1 << 4
+FTM = 1 << 5
+MADE_SHOT = 1 << 6
+TURNOVER = 1 << 7
+REBOUND = 1 << 8
+AFTER_SHOT = 1 << 9
+
+# Bits of the `events` column taken from the V2 descriptions of an event
+V2_REB = 1 << 10
+V2_AST = 1 << 11
+V2_STL = 1 << 12
+V2_BLK = 1 << 13
+V2_TOV = 1 << 14
+V2_STOV = 1 << 15
+
+# Box stats counted from events of the player in `personId`
+V3_STATS = {"FGM": FGM, "FGA": FGA, "FG3M": FG3M, "FG3A": FG3A, "FTM": FTM, "FTA": FTA}
+
+# Box stats counted from V2 descriptions, by the column holding the player credited with them
+V2_STATS = {
+    "PLAYER1_ID": {"REB": V2_REB, "TOV": V2_TOV, "STOV": V2_STOV},
+    "PLAYER2_ID": {"AST": V2_AST, "STL": V2_STL},
+    "PLAYER3_ID": {"BLK": V2_BLK},
+}
+
+BOX_STATS = ["PTS", "FGM", "FGA", "FG3M", "FG3A", "FTM", "FTA", "REB", "AST", "STL", "BLK",
+             "TOV", "STOV"]
+
+def classify(events: pd.DataFrame):
+    """Adds an `events` bit field to merged play-by-play events, so that each event's
+    descriptions are only searched once. Must run before any rows are removed, since
+    rebounds look at the previous event."""
+    events["events"] = classify_events(events)
+
+def classify_events(events: pd.DataFrame) -> np.ndarray:
+    field_goal = (events["isFieldGoal"] == 1).to_numpy()
+    made = (events["shotResult"] == "Made").to_numpy()
+    three = (events["shotValue"] == 3).to_numpy()
+    free_throw = (events["actionType"] == "Free Throw").to_numpy()
+    description = events["description"]
+
+    bits = np.zeros(len(events), dtype=np.uint16)
+    bits[field_goal] |= FGA
+    bits[field_goal & made] |= FGM
+    bits[field_goal & three] |= FG3A
+    bits[field_goal & made & three] |= FG3M
+    bits[free_throw] |= FTA
+    bits[free_throw & description.str.contains("PTS", na=False).to_numpy()] |= FTM
+    bits[made] |= MADE_SHOT
+    bits[(events["actionType"] == "Turnover").to_numpy()] |= TURNOVER
+    bits[description.str.contains("REBOUND", na=False).to_numpy()] |= REBOUND
+    if "prevFGA" in events.columns:
+        bits[((events["prevFGA"] == 1.0) | (events["prevFTA"] == "Free Throw")).to_numpy()] |= AFTER_SHOT
+
+    for column in ["HOMEDESCRIPTION", "VISITORDESCRIPTION"]:
+        description = events[column].fillna("").astype(str)
+        turnover = description.str.contains("Turnover").to_numpy()
+        bits[description.str.contains("REBOUND").to_numpy()] |= V2_REB
+        bits[description.str.contains("AST").to_numpy()] |= V2_AST
+        bits[description.str.contains("STEAL").to_numpy()] |= V2_STL
+        bits[description.str.contains("BLOCK").to_numpy()] |= V2_BLK
+        bits[turnover] |= V2_TOV
+        bits[turnover & ~description.str.contains("Bad Pass").to_numpy()] |= V2_STOV
+    return bits
+
+def count_box_stats(events: pd.DataFrame, player_id: int) -> dict:
+    """A player's box stats, counted from classified play-by-play events"""
+    # Ids may be passed as strings
+    player_id = int(player_id)
+    bits = _events(events)
+    player = events["personId"].to_numpy() == player_id
+    counts = _count_bits(bits[player], V3_STATS)
+
+    made_shots = player & ((bits & MADE_SHOT) != 0)
+    stats = {"PTS": float(events["shotValue"].to_numpy()[made_shots].sum() + counts["FTM"])}
+    stats.update(counts)
+
+    for column, column_bits in V2_STATS.items():
+        stats.update(_count_bits(bits[events[column].to_numpy() == player_id], column_bits))
+
+    return {stat: stats[stat] for stat in BOX_STATS}
+
+def estimate_possessions(events: pd.DataFrame, team_id: int, team_name: str = None) -> float:
+    """A team's possessions in play-by-play events. Turnovers whose description
+    names `team_name` count for the team as well."""
+    fgato, fta, oreb = _possession_events(events, team_id, team_name)
+    return 0.96 * (fgato.sum() + (0.44 * fta.sum()) - oreb.sum())
+
+def possession_weights(events: pd.DataFrame, team_id: int, team_name: str = None) -> np.ndarray:
+    """Each play's share of a team's possessions, adding up to `estimate_possessions`"""
+    fgato, fta, oreb = _possession_events(events, team_id, team_name)
+    return 0.96 * (fgato + (0.44 * fta) - oreb.astype(float))
+
+def _possession_events(events: pd.DataFrame, team_id: int, team_name: str = None) \
+    -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    bits = _events(events)
+    team = events["teamId"].to_numpy() == team_id
+    turnover = (bits & TURNOVER) != 0
+
+    fgato = team & (((bits & FGA) != 0) | turnover)
+    if team_name is not None:
+        named = turnover.copy()
+        named[turnover] = events["description"][turnover].str.contains(team_name, na=False).to_numpy()
+        fgato |= named
+    fta = team & ((bits & FTA) != 0)
+    oreb = team & ((bits & REBOUND) != 0) & ((bits & AFTER_SHOT) != 0) & \
+        (events["prevTeam"].to_numpy() == team_id)
+
+    return fgato, fta, oreb
+
+def _events(events: pd.DataFrame) -> np.ndarray:
+    if "events" in events.columns:
+        return events["events"].to_numpy()
+    return classify_events(events)
+
+def _count_bits(events: np.ndarray, bits: dict) -> dict:
+    counts = ((events[:, None] & np.array(list(bits.values()), dtype=events.dtype)) != 0).sum(axis=0)
+    return {stat: int(count) for stat, count in zip(bits, counts)}
@@ -4,220 +4,216 @@ Play-by-play processing
 import pandas as pd
 import numpy as np
 
+from dans.library.metrics import Metrics
 from dans.library.nba_api_client import NBAApiClient
+from dans.library.pbp_events import classify
+from dans.library.pbp_schema import frames_digest
 
 class PBPProcessor:
     """Processes data for play-by-play data"""
 
-    def process(self, game_id: str, player_id: str) -> dict:
+    # Bump when a change to processing (times, scores, starters, garbage time) changes the
+    # plays that are counted, so cached stats from older versions are recomputed
+    version = 2
 
-        nba_api_client = NBAApiClient()
+    def fetch(self, game_id: str) -> dict:
+        """Requests the raw frames of a game. Safe to call from worker threads."""
 
         # Two play-by-play logs are required. The V3 provides details relevant for scoring
         # stats, whereas V2 is more in depth with non-scoring plays.
-        pbp_v3 = nba_api_client.get_play_by_play_v3(game_id)
-        pbp_v2 = nba_api_client.get_play_by_play_v2(game_id)
-        rotations = nba_api_client.get_rotations(game_id)
+        return NBAApiClient().get_game(game_id)
+
+    def process(self, game_id: str, player_id: str, game: dict = None) -> dict:
+        """Processes a game for a player. `game` is the result of `fetch`, which is
+        called if it isn't given."""
+        return self.for_player(self.prepare(game_id, game), player_id)
+
+    def prepare(self, game_id: str, game: dict = None) -> dict:
+        """Game-level processing shared by every player in the game: scores, margins,
+        clock times, starter counts and garbage time."""
+
+        if game is None:
+            game = self.fetch(game_id)
+        with Metrics.timer("prepare", game_id=game_id):
+            return self._prepare(game_id, game)
+
+    def _prepare(self, game_id: str, game: dict) -> dict:
+        # Taken before the events are modified, so stats can record what they came from
+        inputs = frames_digest(game)
+        events = game["events"]
+        rotations = game["rotations"]
 
         # Show scores for each play
         for score_team in ['scoreHome', 'scoreAway']:
-            pbp_v3[score_team] = pbp_v3[score_team]\
-                .replace(r'^\s*$', "0", regex=True)\
-                .replace("0", np.nan)\
+            events[score_team] = pd.to_numeric(events[score_team], errors='coerce')\
+                .replace(0, np.nan)\
                 .ffill()\
-                .replace(np.nan, "0")\
-                .astype(int)
+                .fillna(0)\
+                .astype(np.int16)
 
         # Show margin for each play
-        pbp_v3['margin'] = abs(pbp_v3['scoreAway'] - pbp_v3['scoreHome'])
-        pbp_v2['margin'] = pbp_v2['SCOREMARGIN']\
-            .replace("0", np.nan)\
-            .ffill()\
-            .replace(np.nan, "0")\
-            .replace("TIE", "0")\
-            .astype(int)
+        events['margin'] = abs(events['scoreAway'] - events['scoreHome'])
         
         # Calculate time for each play in pbp data
-        pbp_v3 = self._calculate_time(pbp_v3, 'clock')
-        pbp_v2 = self._calculate_time(pbp_v2, 'PCTIMESTRING')
+        events = self._calculate_time(events)
 
         # This is used to determine if a rebound is an offensive rebound.
         # This happens before any rows are eliminated so that we always know
         # what events actually happened right before a rebound occurs.
-        pbp_v3['prevTeam'] = pbp_v3['teamId'].shift(1)
-        pbp_v3['prevFGA'] = pbp_v3['isFieldGoal'].shift(1)
-        pbp_v3['prevFTA'] = pbp_v3['actionType'].shift(1)
+        events['prevTeam'] = events['teamId'].shift(1, fill_value=0)
+        events['prevFGA'] = events['isFieldGoal'].shift(1, fill_value=0)
+        events['prevFTA'] = events['actionType'].shift(1)
+
+        # Classify every event once, so counting a player's stats doesn't search descriptions
+        classify(events)
         
-        # Calculate rotations for each play
-        pbp_v3, pbp_v2, team_id, team_name, opp_tricode, bins  = self._handle_rotations(pbp_v3, pbp_v2, rotations, player_id)
+        # Count starters on the court for each play
+        events = self._calculate_starters(events, rotations[0], "homeStarters")
+        events = self._calculate_starters(events, rotations[1], "awayStarters")
 
-        # Remove garbage time
-        all_logs, pbp_v3, pbp_v2 = self._remove_garbage_time(pbp_v3, pbp_v2, bins)
+        events['totalStarters'] = events['homeStarters'] + events['awayStarters']
 
-        # stats = {
-        #     "PLAYER_ID": self.player_id,
-        #     "SEASON": season,
-        #     "GAME_ID": game_id
-        # }
+        # The clock is only needed for the time of each play
+        events = events.drop(columns='clock')
 
         return {
-            "all_logs": all_logs,
-            "pbp_v3": pbp_v3,
-            "pbp_v2": pbp_v2,
+            "game_id": game_id,
+            "inputs": inputs,
+            "all_logs": self._remove_game_garbage_time(events),
+            "events": events,
+            "rotations": rotations
+        }
+
+    def players(self, prepared: dict) -> list[int]:
+        """Ids of the players who appeared in a prepared game"""
+        return pd.concat(prepared["rotations"])["PERSON_ID"].drop_duplicates().tolist()
+
+    def for_player(self, prepared: dict, player_id: str) -> dict:
+        """A player's view of a prepared game. The prepared game isn't modified, so it
+        can be shared by every player in the game."""
+        with Metrics.timer("for_player", game_id=prepared["game_id"], player_id=int(player_id)):
+            return self._for_player(prepared, player_id)
+
+    def _for_player(self, prepared: dict, player_id: str) -> dict:
+        team_id, team_name, opp_tricode, bins = self._handle_rotations(
+            prepared["events"], prepared["rotations"], player_id)
+
+        # Remove garbage time
+        events = self._remove_garbage_time(prepared["events"], bins)
+
+        return {
+            "inputs": prepared["inputs"],
+            "all_logs": prepared["all_logs"],
+            "events": events,
             "team_id": team_id,
             "team_name": team_name,
             "opp_tricode": opp_tricode
         }
 
-    def _calculate_time(self, df: pd.DataFrame, clock_col: str) -> pd.DataFrame:
+    def _calculate_time(self, df: pd.DataFrame) -> pd.DataFrame:
         
-        df.dropna(subset=[clock_col], inplace=True)
-        if clock_col == 'clock':
-            df['minutes'] = df[clock_col].str[2:4].astype(int)
-            df['seconds'] = df[clock_col].str[5:7].astype(int)
-            df['ms'] = df[clock_col].str[8:10].astype(int)
-        else:
-            df['minutes'] = df[clock_col].str.split(':').str[0].astype(int)
-            df['seconds'] = df[clock_col].str.split(':').str[1].astype(int)
-            df['ms'] = 0
-            df.rename(columns={'PERIOD': 'period'}, inplace=True)
-
-        df['maxMargin'] = 10
-        df.loc[df['minutes'] >= 5, 'maxMargin'] = 20
-        df.loc[df['minutes'] >= 8, 'maxMargin'] = 25
-
-        df['maxTime'] = 12 * 60 * 10
-        df.loc[df['period'] > 4, 'maxTime'] = 5 * 60 * 10
-
-        df['time'] = (np.minimum(df['period'] - 1, 4) * 12 * 60 * 10) + \
-            (np.maximum(0, df['period'] - 5) * (5 * 60 * 10)) + \
-            (df['maxTime']) - ((df['minutes'] * 60 * 10) + \
-            (df['seconds'] * 10) + (df['ms'] / 10))
+        df.dropna(subset=['clock'], inplace=True)
+        df['minutes'] = df['clock'].str[2:4].astype(np.int8)
+        df['seconds'] = df['clock'].str[5:7].astype(np.int8)
+        df['ms'] = df['clock'].str[8:10].astype(np.int8)
+
+        minutes = df['minutes'].to_numpy(dtype=np.int64)
+        period = df['period'].to_numpy(dtype=np.int64)
+        df['maxMargin'] = np.select([minutes >= 8, minutes >= 5], [25, 20], 10).astype(np.int8)
+        df['maxTime'] = np.where(period > 4, 5 * 60 * 10, 12 * 60 * 10).astype(np.int16)
+
+        # Small int columns are widened first, so the products don't overflow
+        df['time'] = (np.minimum(period - 1, 4) * 12 * 60 * 10) + \
+            (np.maximum(0, period - 5) * (5 * 60 * 10)) + \
+            (df['maxTime'].to_numpy(dtype=np.int64)) - ((minutes * 60 * 10) + \
+            (df['seconds'].to_numpy(dtype=np.int64) * 10) + (df['ms'].to_numpy(dtype=np.int64) / 10))
 
         return df
 
-    def _handle_rotations(self, pbp_v3: pd.DataFrame, pbp_v2: pd.DataFrame, rotations: list[pd.DataFrame], player_id: str) \
-        -> tuple[pd.DataFrame, pd.DataFrame, str, str, str, list[int]]:
+    def _handle_rotations(self, events: pd.DataFrame, rotations: list[pd.DataFrame], player_id: str) \
+        -> tuple[str, str, str, list[int]]:
 
         home_rotations = rotations[0]
         away_rotations = rotations[1]
 
-        if len(away_rotations[away_rotations['PERSON_ID'] == int(player_id)]) == 0:
+        if not (away_rotations['PERSON_ID'] == int(player_id)).any():
             dfrotation = home_rotations
-            opp_team_id = away_rotations.iloc[0]['TEAM_ID']
+            opp_team_id = away_rotations['TEAM_ID'].iat[0]
         else:
             dfrotation = away_rotations
-            opp_team_id = home_rotations.iloc[0]['TEAM_ID']
+            opp_team_id = home_rotations['TEAM_ID'].iat[0]
 
-        team_name = dfrotation.iloc[0]['TEAM_NAME']
-        opp_tricode = pbp_v3[pbp_v3['teamId'] == opp_team_id].iloc[0]['teamTricode']
+        team_name = dfrotation['TEAM_NAME'].iat[0]
+        opp_tricode = events['teamTricode'].to_numpy()[events['teamId'].to_numpy() == opp_team_id][0]
 
-        player = dfrotation[dfrotation['PERSON_ID'] == int(player_id)]
-        team_id = dfrotation[dfrotation['PERSON_ID'] == int(player_id)].iloc[0]['TEAM_ID']
-        bins = dfrotation[dfrotation['PERSON_ID'] == int(player_id)]\
-            [['IN_TIME_REAL', 'OUT_TIME_REAL']].values.tolist()
+        stints = dfrotation[dfrotation['PERSON_ID'] == int(player_id)]
+        team_id = stints['TEAM_ID'].iat[0]
+        bins = stints[['IN_TIME_REAL', 'OUT_TIME_REAL']].values.tolist()
 
-        pbp_v3, pbp_v2 = self._calculate_starters(pbp_v3, pbp_v2, home_rotations, "homeStarters")
-        pbp_v3, pbp_v2 = self._calculate_starters(pbp_v3, pbp_v2, away_rotations, "awayStarters")
+        return (team_id, team_name, opp_tricode, bins)
 
-        pbp_v3['totalStarters'] = pbp_v3['homeStarters'] + pbp_v3['awayStarters']
-        pbp_v2['totalStarters'] = pbp_v2['homeStarters'] + pbp_v2['awayStarters']
+    def _garbage_time(self, events: pd.DataFrame) -> np.ndarray:
+        return ((events['period'] == 4) & \
+            (events['margin'] >= events['maxMargin']) & \
+            (events['totalStarters'] <= 2)).to_numpy()
 
-        return (pbp_v3, pbp_v2, team_id, team_name, opp_tricode, bins)
+    def _remove_game_garbage_time(self, events: pd.DataFrame) -> pd.DataFrame:
+        """Every play of the game, without garbage time"""
 
-    def _remove_garbage_time(self, pbp_v3: pd.DataFrame, pbp_v2: pd.DataFrame, bins: list[list[int]]) \
-        -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        # Plays in garbage time are dropped, so every remaining play is counted
+        return events[~self._garbage_time(events)].assign(counted=np.int8(1))
 
-        all_logs = pbp_v3.copy()
-        
+    def _remove_garbage_time(self, events: pd.DataFrame, bins: list[list[int]]) -> pd.DataFrame:
+        """Plays while the player was on the court, without garbage time"""
 
-        all_logs.loc[:, 'counted'] = 1
-        pbp_v3.loc[:, 'counted'] = 1
-        pbp_v2.loc[:, 'counted'] = 1
-        
-
-        curr = False
-        curr_other = False
+        time = events['time'].to_numpy()
+        on_court = np.zeros(len(events), dtype=bool)
         for bin_ in bins:
-            curr = curr | ((pbp_v3['time'] >= bin_[0]) & (pbp_v3['time'] <= bin_[1]))
-            curr_other = curr_other | ((pbp_v2['time'] >= bin_[0]) & (pbp_v2['time'] <= bin_[1]))
-        pbp_v3 = pbp_v3[curr]
-        pbp_v2 = pbp_v2[curr_other]
-        
-        all_logs_garbage_time = \
-            (all_logs['period'] == 4) & \
-            (all_logs['margin'] >= all_logs['maxMargin']) & \
-            (all_logs['totalStarters'] <= 2)
-        garbage_time = \
-            (pbp_v3['period'] == 4) & \
-            (pbp_v3['margin'] >= pbp_v3['maxMargin']) & \
-            (pbp_v3['totalStarters'] <= 2)
-        garbage_time_other = \
-            (pbp_v2['period'] == 4) & \
-            (pbp_v2['margin'] >= pbp_v2['maxMargin']) & \
-            (pbp_v2['totalStarters'] <= 2)
-
-    
-        all_logs.loc[all_logs_garbage_time, 'counted'] = 0
-        pbp_v3.loc[garbage_time, 'counted'] = 0
-        pbp_v2.loc[garbage_time_other, 'counted'] = 0
-        
-
-        all_logs.loc[:, 'counted'] = all_logs['counted'].replace(0, np.nan).bfill().replace(np.nan, 0)
-        pbp_v3.loc[:, 'counted'] = pbp_v3['counted'].replace(0, np.nan).bfill().replace(np.nan, 0)
-        pbp_v2.loc[:, 'counted'] = pbp_v2['counted'].replace(0, np.nan).bfill().replace(np.nan, 0)
-
-        all_logs = all_logs[~all_logs_garbage_time]
-        pbp_v3 = pbp_v3[~garbage_time]
-        pbp_v2 = pbp_v2[~garbage_time_other]
-
-        return all_logs, pbp_v3, pbp_v2
-
-    def _calculate_starters(self, pbp_v3: pd.DataFrame, pbp_v2: pd.DataFrame, dfrotation: pd.DataFrame, team: str) \
-        -> tuple[pd.DataFrame, pd.DataFrame]:
-
-        starters = set(dfrotation[dfrotation['IN_TIME_REAL'] == 0]['PERSON_ID'].values)
-        dfrotation['IN_TIME_REAL'] = dfrotation['IN_TIME_REAL'].astype(int)
-        dfrotation['OUT_TIME_REAL'] = dfrotation['OUT_TIME_REAL'].astype(int)
-        dfrotation['PERSON_ID_COPY'] = dfrotation['PERSON_ID']
-        df_dict = dfrotation.set_index(["PERSON_ID_COPY", "IN_TIME_REAL", "OUT_TIME_REAL"])\
-            ["PERSON_ID"].to_dict()
-
-        lineups_changedf = pbp_v3[
-            (pbp_v3['description'].str.contains("SUB: ") &
-            pbp_v3['description'].str.contains(" FOR ")) |
-            (pbp_v3['description'].str.contains("Start of") &
-            pbp_v3['description'].str.contains(" Period"))
-        ].copy()
-        
-        lineups_changedf2 = pbp_v2[
-            (pbp_v2['HOMEDESCRIPTION'].str.contains("SUB: ") &
-            pbp_v2['HOMEDESCRIPTION'].str.contains(" FOR ")) |
-            (pbp_v2['VISITORDESCRIPTION'].str.contains("SUB: ") &
-            pbp_v2['VISITORDESCRIPTION'].str.contains(" FOR ")) |
-            (pbp_v2['NEUTRALDESCRIPTION'].str.contains("Start of") &
-            pbp_v2['NEUTRALDESCRIPTION'].str.contains(" Period"))
-        ].copy()
-
-        # pbp_v3[team] = pbp_v3['time'].apply(lambda x: set(
-        #         (player for bounds, player in df_dict.items() if x in range(*bounds[1:]))))
-        # pbp_v2[team] = pbp_v2['time'].apply(lambda x: set(
-        #         (player for bounds, player in df_dict.items() if x in range(*bounds[1:]))))
-        
-        lineups_changedf[team] = lineups_changedf['time'].apply(lambda x: set(
-                (player for bounds, player in df_dict.items() if x in range(*bounds[1:]))))
-        lineups_changedf2[team] = lineups_changedf2['time'].apply(lambda x: set(
-                (player for bounds, player in df_dict.items() if x in range(*bounds[1:]))))
-
-        lineups_changedf[team] = lineups_changedf.apply(lambda x:
-            len(x[team].intersection(starters)), axis=1)
-        lineups_changedf2[team] = lineups_changedf2.apply(lambda x:
-            len(x[team].intersection(starters)), axis=1)
-        
-        pbp_v3[team] = lineups_changedf[team]
-        pbp_v3[team] = pbp_v3[team].ffill()
-        
-        pbp_v2[team] = lineups_changedf2[team]
-        pbp_v2[team] = pbp_v2[team].ffill()
-        
-        return (pbp_v3, pbp_v2)
+            on_court |= (time >= bin_[0]) & (time <= bin_[1])
+
+        return events[on_court & ~self._garbage_time(events)].assign(counted=np.int8(1))
+
+    def on_court(self, dfrotation: pd.DataFrame, times: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Players of a team's rotation, and a matrix of which of them were on the court at
+        each of `times` (one row per time, one column per player)."""
+
+        players, codes = np.unique(dfrotation['PERSON_ID'].to_numpy(), return_inverse=True)
+        in_time = dfrotation['IN_TIME_REAL'].to_numpy().astype(int)
+        out_time = dfrotation['OUT_TIME_REAL'].to_numpy().astype(int)
+        times = np.asarray(times, dtype=float)
+
+        # Sorted stint edges of every player, offset so that each player gets its own span.
+        # A time is inside one of a player's stints when an odd number of its edges are at
+        # or before it, so one searchsorted answers every (time, player) pair.
+        span = max(out_time.max(initial=0), np.nanmax(times, initial=0)) + 1
+        order = np.lexsort((in_time, codes))
+        edges = (np.column_stack([in_time[order], out_time[order]]) + \
+            (codes[order] * span)[:, None]).ravel()
+        queries = times[:, None] + np.arange(len(players)) * span
+        matrix = np.searchsorted(edges, queries, side='right') % 2 == 1
+        return players, matrix
+
+    def _calculate_starters(self, events: pd.DataFrame, dfrotation: pd.DataFrame, team: str) -> pd.DataFrame:
+
+        starters = dfrotation[dfrotation['IN_TIME_REAL'] == 0]['PERSON_ID'].values
+
+        lineup_changes = \
+            (events['description'].str.contains("SUB: ") &
+            events['description'].str.contains(" FOR ")) | \
+            (events['description'].str.contains("Start of") &
+            events['description'].str.contains(" Period"))
+        lineup_changes = lineup_changes.fillna(False).to_numpy(dtype=bool)
+
+        # Starters on the court after each lineup change
+        times = events['time'].to_numpy()[lineup_changes]
+        players, matrix = self.on_court(dfrotation, times)
+        counts = matrix[:, np.isin(players, starters)].sum(axis=1)
+
+        # Starters are only counted at whole tenths of a second
+        counts[times != np.floor(times)] = 0
+
+        column = np.full(len(events), np.nan)
+        column[lineup_changes] = counts
+        events[team] = pd.Series(column, index=events.index).ffill().astype(np.float32)
+
+        return events
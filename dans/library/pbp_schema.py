@@ -0,0 +1,82 @@
+"""
+Compact dtypes of play-by-play frames
+"""
+import hashlib
+import pandas as pd
+
+# Columns of the merged play-by-play events that are kept, and their dtypes. Every other
+# column is dropped. Missing scores, player ids and team ids become 0.
+EVENT_DTYPES = {
+    "actionNumber": "int32",
+    "clock": "object",
+    "period": "int8",
+    "teamId": "int32",
+    "teamTricode": "category",
+    "personId": "int32",
+    "shotResult": "category",
+    "isFieldGoal": "int8",
+    "scoreHome": "int16",
+    "scoreAway": "int16",
+    "location": "category",
+    "description": "object",
+    "actionType": "category",
+    "subType": "category",
+    "shotValue": "int8",
+    "EVENTNUM": "float32",
+    "HOMEDESCRIPTION": "object",
+    "VISITORDESCRIPTION": "object",
+    "PLAYER1_ID": "int32",
+    "PLAYER2_ID": "int32",
+    "PLAYER3_ID": "int32"
+}
+
+# Columns of the GameRotation frames that are kept
+ROTATION_COLUMNS = ["TEAM_ID", "TEAM_NAME", "PERSON_ID", "PLAYER_FIRST", "PLAYER_LAST",
+                    "IN_TIME_REAL", "OUT_TIME_REAL"]
+
+def compact_events(events: pd.DataFrame) -> pd.DataFrame:
+    """Merged play-by-play events with only the columns in `EVENT_DTYPES`, as those dtypes"""
+    columns = {}
+    for column, dtype in EVENT_DTYPES.items():
+        if column not in events.columns:
+            continue
+        values = events[column]
+        if dtype.startswith("int") and values.dtype != dtype:
+            # Scores are strings, and may be blank
+            values = pd.to_numeric(values, errors="coerce").fillna(0)
+        columns[column] = values.astype(dtype)
+    return pd.DataFrame(columns, index=events.index)
+
+def compact_rotations(rotations: list[pd.DataFrame]) -> list[pd.DataFrame]:
+    return [rotation[[column for column in ROTATION_COLUMNS if column in rotation.columns]]
+            for rotation in rotations]
+
+def frames_digest(game: dict) -> str:
+    """Digest of the values of a game's events and rotations, from `PBPProcessor.fetch`.
+    Games with the same values have the same digest, whether they were requested or read
+    from the `GameStore`."""
+    digest = hashlib.sha256()
+    for frame in [game["events"], *game["rotations"]]:
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def memory_report(game: dict) -> pd.DataFrame:
+    """Dtype and bytes of every column of the frames of a game, from `PBPProcessor.fetch`
+    or `PBPProcessor.prepare`"""
+    rows = []
+    for name, frames in game.items():
+        if isinstance(frames, pd.DataFrame):
+            frames = [frames]
+        if not isinstance(frames, list):
+            continue
+        for i, frame in enumerate(frames):
+            usage = frame.memory_usage(index=False, deep=True)
+            rows += [{"FRAME": name if len(frames) == 1 else f"{name}_{i}", "COLUMN": column,
+                      "DTYPE": str(frame[column].dtype), "BYTES": int(usage[column])}
+                     for column in frame.columns]
+    report = pd.DataFrame(rows, columns=["FRAME", "COLUMN", "DTYPE", "BYTES"])
+    return report.sort_values(by="BYTES", ascending=False, ignore_index=True)
+
+def frame_bytes(game: dict) -> int:
+    """Total bytes of the frames of a game"""
+    return int(memory_report(game)["BYTES"].sum())
@@ -0,0 +1,160 @@
+"""
+Lineup stints of play-by-play games
+"""
+import numpy as np
+import pandas as pd
+
+from dans.library.pbp_events import possession_weights
+from dans.library.pbp_processor import PBPProcessor
+
+class StintIndex:
+    """Segments of a team's games between lineup changes.
+
+    Each segment holds the team's lineup as a bitmask over the players the team used, and
+    sums of possessions, points and opponent-adjusted points for both teams. Plays are
+    taken from `PBPProcessor.prepare`, so garbage time is left out.
+    """
+
+    # Stats summed over the plays of each segment
+    totals = ["SECONDS", "POSS", "OPP_POSS", "PTS", "OPP_PTS", "ADJ_PTS"]
+
+    def __init__(self, team: str, teams: pd.DataFrame, adj_def: bool = True):
+        self.team = team
+        self.teams = teams.set_index(["SEASON", "MATCHUP"])
+        self.drtg = "ADJ_DRTG" if adj_def else "DRTG"
+        self.player_ids = []
+        self.player_names = {}
+        self.segments = []
+
+    def add_game(self, prepared: dict, season: int):
+        """Adds the segments of a game from `PBPProcessor.prepare`"""
+
+        events = prepared["events"]
+        rotations = prepared["rotations"]
+        tricodes = events[events["teamId"] != 0].dropna(subset=["teamTricode"])\
+            .drop_duplicates("teamId").set_index("teamId")["teamTricode"]
+
+        sides = [i for i, rotation in enumerate(rotations)
+                 if tricodes.get(rotation.iloc[0]["TEAM_ID"]) == self.team]
+        if not sides:
+            raise ValueError(f"{self.team} did not play in game {prepared['game_id']}.")
+        rotation = rotations[sides[0]]
+        opp_rotation = rotations[1 - sides[0]]
+        team_id = rotation.iloc[0]["TEAM_ID"]
+        opp_id = opp_rotation.iloc[0]["TEAM_ID"]
+
+        home_id = events.loc[(events["location"] == "h") & (events["teamId"] != 0), "teamId"].mode()
+        score, opp_score = ("scoreHome", "scoreAway") if len(home_id) and home_id[0] == team_id \
+            else ("scoreAway", "scoreHome")
+
+        times = events["time"].to_numpy()
+        plays = pd.DataFrame({
+            "SECONDS": np.diff(times, append=times[-1]) / 10,
+            "POSS": possession_weights(events, team_id, rotation.iloc[0]["TEAM_NAME"]),
+            "OPP_POSS": possession_weights(events, opp_id, opp_rotation.iloc[0]["TEAM_NAME"]),
+            "PTS": np.diff(events[score].to_numpy(), prepend=0),
+            "OPP_PTS": np.diff(events[opp_score].to_numpy(), prepend=0),
+        })
+        opp_drtg = self._opp_drtg(season, tricodes.get(opp_id))
+        plays["ADJ_PTS"] = plays["PTS"] * (110 / opp_drtg)
+
+        players, matrix = PBPProcessor().on_court(rotation, times)
+        lineups = np.bitwise_or.reduce(
+            np.where(matrix, self._bits(players, rotation), np.uint64(0)), axis=1)
+
+        # Garbage time is left out, then consecutive plays with the same lineup form a segment
+        counted = events.index.isin(prepared["all_logs"].index)
+        plays, lineups = plays[counted], lineups[counted]
+        if len(lineups) == 0:
+            return
+        starts = np.flatnonzero(np.diff(lineups, prepend=lineups[0] + 1) != 0)
+
+        segments = pd.DataFrame(np.add.reduceat(plays.to_numpy(dtype=float), starts, axis=0),
+                                columns=self.totals)
+        segments.insert(0, "GAME_ID", prepared["game_id"])
+        segments.insert(1, "SEASON", season)
+        segments.insert(2, "OPP", tricodes.get(opp_id))
+        segments.insert(3, "LINEUP", lineups[starts])
+        segments.insert(4, "PLAYERS", matrix[counted][starts].sum(axis=1))
+        segments["OPP_DRTG"] = opp_drtg
+        self.segments.append(segments)
+
+    def get_segments(self) -> pd.DataFrame:
+        if not self.segments:
+            return pd.DataFrame()
+        return pd.concat(self.segments, ignore_index=True)
+
+    def lineups(self) -> pd.DataFrame:
+        """Totals and ratings of each five-man lineup"""
+        segments = self._five_man_segments()
+        if segments.empty:
+            return pd.DataFrame()
+
+        lineups = segments.groupby("LINEUP", sort=False)
+        stats = lineups[self.totals].sum()
+        stats.insert(0, "GAMES", lineups["GAME_ID"].nunique())
+        stats = self._ratings(stats).reset_index()
+
+        players = [self._decode(lineup) for lineup in stats["LINEUP"]]
+        stats.insert(0, "PLAYER_IDS", players)
+        stats["LINEUP"] = [" - ".join(self.player_names[player] for player in lineup)
+                           for lineup in players]
+        return stats.sort_values(by="POSS", ascending=False, ignore_index=True)
+
+    def on_off(self) -> pd.DataFrame:
+        """Totals and ratings of the team with each player on and off the court"""
+        segments = self._five_man_segments()
+        if segments.empty:
+            return pd.DataFrame()
+
+        # Segments (rows) that each player (columns) was on the court for
+        bits = np.uint64(1) << np.arange(len(self.player_ids), dtype=np.uint64)
+        on_court = (segments["LINEUP"].to_numpy()[:, None] & bits) != 0
+        totals = segments[self.totals].to_numpy()
+
+        on = pd.DataFrame(on_court.T.astype(float) @ totals, columns=self.totals)
+        off = pd.DataFrame(totals.sum(axis=0) - on.to_numpy(), columns=self.totals)
+        on, off = self._ratings(on), self._ratings(off)
+
+        stats = pd.concat([on.add_prefix("ON_"), off.add_prefix("OFF_")], axis=1)
+        stats["ON_OFF"] = stats["ON_NET_RTG"] - stats["OFF_NET_RTG"]
+        stats.insert(0, "PLAYER_ID", self.player_ids)
+        stats.insert(1, "PLAYER_NAME", [self.player_names[player] for player in self.player_ids])
+        return stats[stats["ON_POSS"] > 0].sort_values(by="ON_POSS", ascending=False, ignore_index=True)
+
+    def _five_man_segments(self) -> pd.DataFrame:
+        segments = self.get_segments()
+        if segments.empty:
+            return segments
+        return segments[segments["PLAYERS"] == 5]
+
+    def _ratings(self, stats: pd.DataFrame) -> pd.DataFrame:
+        stats["MIN"] = stats.pop("SECONDS") / 60
+        poss = stats["POSS"].where(stats["POSS"] > 0)
+        opp_poss = stats["OPP_POSS"].where(stats["OPP_POSS"] > 0)
+        stats["ORTG"] = 100 * stats["PTS"] / poss
+        stats["DRTG"] = 100 * stats["OPP_PTS"] / opp_poss
+        stats["NET_RTG"] = stats["ORTG"] - stats["DRTG"]
+        stats["ADJ_ORTG"] = 100 * stats.pop("ADJ_PTS") / poss
+        return stats
+
+    def _bits(self, players: np.ndarray, rotation: pd.DataFrame) -> np.ndarray:
+        """Bit of each player in the lineup bitmasks, adding new players to the index"""
+        for player in players:
+            if int(player) not in self.player_names:
+                if len(self.player_ids) == 64:
+                    raise ValueError(f"{self.team} used more than 64 players.")
+                row = rotation[rotation["PERSON_ID"] == player].iloc[0]
+                self.player_ids.append(int(player))
+                self.player_names[int(player)] = f"{row['PLAYER_FIRST']} {row['PLAYER_LAST']}"
+        index = {player: i for i, player in enumerate(self.player_ids)}
+        return np.uint64(1) << np.array([index[player] for player in players], dtype=np.uint64)
+
+    def _decode(self, lineup: int) -> tuple:
+        return tuple(player for i, player in enumerate(self.player_ids) if int(lineup) >> i & 1)
+
+    def _opp_drtg(self, season: int, opp_tricode: str) -> float:
+        try:
+            return float(self.teams.loc[(season, opp_tricode), self.drtg])
+        except KeyError:
+            return np.nan
@@ -0,0 +1,144 @@
+"""
+Player name resolution
+"""
+import difflib
+import threading
+import numpy as np
+import pandas as pd
+from unidecode import unidecode
+
+from dans.library.reference_data import ReferenceData
+
+# Reference table and id column of each site's player names
+SITES = {
+    "SUFFIX": "player_names",
+    "NBA_ID": "player_ids"
+}
+
+def normalize(names: pd.Series) -> pd.Series:
+    """Names without accents, case, periods or apostrophes, and with hyphens as spaces,
+    so that `Luka Dončić`, `luka doncic` and `P.J. Tucker`/`PJ Tucker` match"""
+    names = names.astype(str).map(unidecode).str.lower()
+    names = names.str.replace(r"[.'`’]", "", regex=True).str.replace(r"[-_,]", " ", regex=True)
+    return names.str.split().str.join(" ")
+
+class PlayerIndex:
+    """Resolves player names to basketball-reference suffixes and NBA ids.
+
+    Names are matched exactly first, then by their normalized form. A normalized name
+    shared by several players of a site is ambiguous, and isn't resolved. Names that
+    aren't resolved get the closest known names as candidates.
+    """
+
+    # Similarity (0 to 1) a known name needs to be a candidate, and candidates per name
+    cutoff = 0.75
+    candidates = 3
+
+    _index = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def resolve(cls, names: list[str]) -> pd.DataFrame:
+        """NAME, normalized KEY, SUFFIX, NBA_ID, MATCH (`exact`, `normalized`, `ambiguous` or
+        `none`) and CANDIDATES of each name, in order"""
+        index = cls._build()
+        resolved = pd.DataFrame({"NAME": pd.Series(list(names), dtype=object)})
+        resolved["KEY"] = normalize(resolved["NAME"])
+
+        exact, normalized, ambiguous = [], [], []
+        for id_column, site in index["sites"].items():
+            exact.append(resolved["NAME"].map(site["exact"]))
+            normalized.append(resolved["KEY"].map(site["unique"]))
+            ambiguous.append(resolved["KEY"].isin(site["ambiguous"]).to_numpy())
+            resolved[id_column] = np.where(exact[-1].notna(), exact[-1], normalized[-1])
+        resolved["NBA_ID"] = resolved["NBA_ID"].astype("Int64")
+
+        resolved["MATCH"] = np.select(
+            [np.any([ids.notna().to_numpy() for ids in exact], axis=0),
+             np.any([ids.notna().to_numpy() for ids in normalized], axis=0),
+             np.any(ambiguous, axis=0)],
+            ["exact", "normalized", "ambiguous"], "none")
+
+        unresolved = resolved["MATCH"].isin(["none", "ambiguous"]).to_numpy()
+        resolved["CANDIDATES"] = [cls._candidates(index, key) if missing else []
+                                  for key, missing in zip(resolved["KEY"], unresolved)]
+
+        return resolved[["NAME", "KEY", "SUFFIX", "NBA_ID", "MATCH", "CANDIDATES"]]
+
+    @classmethod
+    def find(cls, name: str, id_column: str):
+        """`id_column` and the site's spelling of one player's name, and an error naming
+        the candidates if it isn't resolved"""
+        player = cls.resolve([name]).iloc[0]
+        if pd.notna(player[id_column]):
+            site = cls._build()["sites"][id_column]
+            return player[id_column], name if name in site["exact"] else site["names"][player["KEY"]], None
+        error = f"Player not found: `{name}`"
+        if player["MATCH"] == "ambiguous":
+            error += ". The name belongs to several players"
+        if player["CANDIDATES"]:
+            error += ". Did you mean " + ", ".join(f"`{candidate}`" for candidate in player["CANDIDATES"]) + "?"
+        return None, name, error
+
+    @classmethod
+    def links(cls) -> pd.DataFrame:
+        """basketball-reference SUFFIX and NBA_ID of every player whose normalized name
+        belongs to one player on each site"""
+        return cls._build()["links"]
+
+    @classmethod
+    def _candidates(cls, index: dict, key: str) -> list[str]:
+        """Known names with the same normalized name, or else the closest ones among the
+        names that share the start of a first or last name with it"""
+        if key in index["names"]:
+            return list(index["names"][key])
+        keys = set().union(*(index["prefixes"].get(prefix, ()) for prefix in _prefixes(key)))
+        matches = difflib.get_close_matches(key, sorted(keys), n=cls.candidates, cutoff=cls.cutoff)
+        return [name for match in matches for name in index["names"][match]]
+
+    @classmethod
+    def _build(cls) -> dict:
+        """Index of the current reference tables, built once per table"""
+        tables = {id_column: ReferenceData.table(table) for id_column, table in SITES.items()}
+        with cls._lock:
+            if cls._index is not None and all(cls._index["tables"][id_column] is table
+                                               for id_column, table in tables.items()):
+                return cls._index
+
+            sites = {}
+            names = {}
+            unique_keys = []
+            for id_column, table in tables.items():
+                players = pd.DataFrame({"NAME": table["NAME"], "KEY": normalize(table["NAME"]),
+                                        id_column: table[id_column]})
+                counts = players["KEY"].value_counts()
+                unique = players[players["KEY"].map(counts) == 1]
+                sites[id_column] = {
+                    # Duplicate names resolve to their first player, like an exact lookup
+                    "exact": players.drop_duplicates("NAME").set_index("NAME")[id_column],
+                    "unique": unique.set_index("KEY")[id_column],
+                    "names": unique.set_index("KEY")["NAME"],
+                    "ambiguous": set(counts.index[counts > 1])
+                }
+                unique_keys.append(unique[["KEY", id_column]])
+                for key, name in zip(players["KEY"], players["NAME"]):
+                    if name not in names.setdefault(key, []):
+                        names[key].append(name)
+
+            prefixes = {}
+            for key in names:
+                for prefix in _prefixes(key):
+                    prefixes.setdefault(prefix, set()).add(key)
+
+            cls._index = {
+                "tables": tables,
+                "sites": sites,
+                "names": names,
+                "prefixes": prefixes,
+                "links": pd.merge(*unique_keys, on="KEY")
+            }
+            return cls._index
+
+def _prefixes(key: str) -> set[str]:
+    # First three letters of each word, so that typos past them still find the name
+    return {word[:3] for word in key.split()}
@@ -0,0 +1,22 @@
+'''Overlapping fetches with processing.'''
+from concurrent.futures import Future, ThreadPoolExecutor
+
+def prefetch(fetch, items: list, depth: int = 4):
+    '''Yields `(item, future)` for each item in order, where the future holds `fetch(item)`.
+
+    Up to `depth` upcoming items are fetched in worker threads while the caller works
+    on the current one, so network waits overlap with processing. Calling `result()`
+    on a future returns the fetched value or raises the exception `fetch` raised.
+    '''
+    items = list(items)
+    with ThreadPoolExecutor(max_workers=max(depth, 1)) as executor:
+        futures: list[Future] = [executor.submit(fetch, item) for item in items[:depth]]
+        try:
+            for i, item in enumerate(items):
+                if i + depth < len(items):
+                    futures.append(executor.submit(fetch, items[i + depth]))
+                yield item, futures[i]
+        finally:
+            # Stop fetching items the caller will never ask for
+            for future in futures:
+                future.cancel()
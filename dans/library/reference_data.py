@@ -0,0 +1,71 @@
+"""
+Reference tables bundled with the package
+"""
+import os
+import weakref
+import threading
+import pandas as pd
+
+class ReferenceData:
+    """Process-wide registry of the reference tables in `data/`.
+
+    Each table is read once, the first time it is used, and shared by every endpoint.
+    `find` looks up rows by key with a hash index that is built once per table and key
+    columns. Tables are shared, so callers must not modify them in place.
+    """
+
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+    files = {
+        "player_names": "player_names.csv",
+        "player_ids": "player_ids.csv",
+        "bball_ref_teams": "bball-ref-teams.csv",
+        "nba_stats_teams": "nba-stats-teams.csv",
+        "season_averages": "season-averages.csv"
+    }
+
+    _tables = {}
+    _indexes = {}
+    _lock = threading.RLock()
+
+    @classmethod
+    def table(cls, name: str) -> pd.DataFrame:
+        with cls._lock:
+            table = cls._tables.get(name)
+            if table is None:
+                # The first column of each file is the index it was saved with
+                table = cls._tables[name] = pd.read_csv(os.path.join(cls.path, cls.files[name]),
+                                                        index_col=0)
+            return table
+
+    @classmethod
+    def reload(cls, name: str = None):
+        """Reads a table (or every table) again the next time it is used"""
+        with cls._lock:
+            for table in [name] if name is not None else list(cls._tables):
+                cls._tables.pop(table, None)
+
+    @classmethod
+    def find(cls, table, columns, key) -> pd.Series:
+        """First row of `table` (a table name or a DataFrame) whose `columns` equal `key`,
+        or None. Pass a list of columns and a tuple key for composite keys."""
+        if isinstance(table, str):
+            table = cls.table(table)
+        position = cls.index(table, columns).get(key)
+        return table.iloc[position] if position is not None else None
+
+    @classmethod
+    def index(cls, table: pd.DataFrame, columns) -> dict:
+        """Position of the first row of `table` with each key of `columns`. Built once per
+        table, and dropped when the table is."""
+        cache_key = (id(table), tuple(columns) if isinstance(columns, list) else columns)
+        with cls._lock:
+            index = cls._indexes.get(cache_key)
+            if index is None:
+                keys = zip(*(table[column] for column in columns)) \
+                    if isinstance(columns, list) else table[columns]
+                index = {}
+                for position, key in enumerate(keys):
+                    index.setdefault(key, position)
+                cls._indexes[cache_key] = index
+                weakref.finalize(table, cls._indexes.pop, cache_key, None)
+            return index
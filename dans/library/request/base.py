@@ -1,16 +1,62 @@
 """Base class for data sources"""
-import json
-import requests
 from abc import ABC, abstractmethod
+import requests
 import pandas as pd
-from ratelimit import sleep_and_retry, limits
-
-from nba_api.stats.endpoints.playergamelog import PlayerGameLog
-from nba_api.stats.endpoints.playbyplayv3 import PlayByPlayV3
-from dans.library.request.cache.cached_args import cached_args
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 class DataSource(ABC):
     """Abstract base class for data sources"""
+
+    # Host whose rate budget the source's requests count against
+    host = None
+
+    # Connection pooling and transport-level retries for the source's session. The session
+    # only retries failed connections, which never reach the host. Responses and read
+    # errors are left to the RetryPolicy, so each attempt counts against the host's budget.
+    pool_size = 10
+    retries = 3
+    backoff_factor = 0.5
+
+    _session = None
+
+    @property
+    def session(self) -> requests.Session:
+        """Keep-alive session shared by every request to this source"""
+        if self._session is None:
+            adapter = HTTPAdapter(
+                pool_connections=self.pool_size,
+                pool_maxsize=self.pool_size,
+                max_retries=Retry(
+                    total=self.retries,
+                    read=0,
+                    status=0,
+                    backoff_factor=self.backoff_factor,
+                    allowed_methods=("GET",),
+                    raise_on_status=False
+                )
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+
+    def configure_session(self, pool_size: int = None, retries: int = None,
+                          backoff_factor: float = None):
+        """Changes pooling/retry settings. The session is rebuilt on its next use."""
+        if pool_size is not None:
+            self.pool_size = pool_size
+        if retries is not None:
+            self.retries = retries
+        if backoff_factor is not None:
+            self.backoff_factor = backoff_factor
+        self.close()
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
     
     @abstractmethod
     def get_headers(self) -> dict:
@@ -30,6 +76,8 @@ class DataSource(ABC):
 
 class APISource(DataSource):
     """Handler for API calls with rate limiting"""
+
+    host = "stats.nba.com"  # nba_api endpoints are all served by stats.nba.com
     
     def __init__(self, function, args):
         self.function = function
@@ -47,61 +95,3 @@ class APISource(DataSource):
     def parse_response(self, response) -> pd.DataFrame:
         # For APIs, the response is whatever the function returns
         return response
-
-file = 0
-
-class RateLimiter:
-    """Rate limiting functionality"""
-    
-    file = 0
-    
-    @staticmethod
-    @sleep_and_retry
-    @limits(calls=19, period=60)
-    def make_request(func, *args, **kwargs):
-        
-        global file
-        file += 1
-              
-        # Check if API request is cached (for testing purposes)
-        if 'headers' in kwargs and 'User-Agent' not in kwargs['headers']:
-            kw_tup = kwargs.copy()
-            kw_tup['headers'] = tuple(list(kw_tup['headers'].items()))
-            kw_tup = tuple(list(kw_tup.items()))
-            req_tup = (args, kw_tup)
-            if req_tup in cached_args:
-                res = cached_args[req_tup]
-                return res
-        
-        # Check if request.get is cached (for testing purposes)
-        if 'headers' in kwargs and 'User-Agent' in kwargs['headers']:
-            kw_tup = kwargs.copy()
-            kw_tup['headers'] = tuple(list(kw_tup['headers'].items()))
-            kw_tup['params'] = tuple(list(kw_tup['params'].items()))
-            kw_tup = tuple(list(kw_tup.items()))
-            req_tup = (args, kw_tup)
-            if req_tup in cached_args:
-                res = cached_args[req_tup]
-                return res
-        
-        if 'player_id' in kwargs and 'season' in kwargs and 'season_type_all_star' in kwargs:
-            kw_tup = tuple(list(kwargs.items()))
-            req_tup = (args, kw_tup)
-            if req_tup in cached_args:
-                res = cached_args[req_tup]
-                return res
-        
-        if 'game_id' in kwargs:
-            kw_tup = tuple(list(kwargs.items()))
-            req_tup = (str(func), args, kw_tup)
-            if req_tup in cached_args:
-                res = cached_args[req_tup]
-                return res
-        
-        res = func(*args, **kwargs)
-        # dfs = res.get_data_frames()
-        # print(dfs)
-        # for df in dfs:
-        #     df.to_csv(f"a{file}.txt", index=False)
-        #     file += 1
-        return res
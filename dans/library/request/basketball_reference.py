@@ -1,4 +1,7 @@
 """Basketball-Reference requests handler"""
+import re
+import lxml.etree
+import lxml.html
 import pandas as pd
 from bs4 import BeautifulSoup
 
@@ -6,6 +9,8 @@ from dans.library.request.base import DataSource
 
 class BasketballReferenceSource(DataSource):
     """Handler for Basketball Reference web scraping"""
+
+    host = "www.basketball-reference.com"
     
     def can_handle(self, url: str) -> bool:
         return "basketball-reference.com" in url
@@ -23,9 +28,53 @@ class BasketballReferenceSource(DataSource):
         if response.status_code != 200:
             print(f"{response.status_code} Error")
             return pd.DataFrame()
-        
+
+        # Only the requested table is parsed. Pages are parsed whole only when the
+        # table can't be located by its id, or its source isn't a single table lxml can parse.
+        fragment = self._table_fragment(response.text, attr_id)
+        if fragment is not None:
+            try:
+                return self._parse_fragment(fragment)
+            except (lxml.etree.ParserError, lxml.etree.XMLSyntaxError):
+                pass
+        return self._parse_with_soup(response.text, attr_id)
+
+    def _table_fragment(self, html: str, attr_id):
+        """Source of the table with the requested id, or None if it can't be located"""
+        if not attr_id or list(attr_id) != ["id"]:
+            return None
+
+        # Some tables are commented out in the page source, which doesn't matter here
+        match = re.search(r'<table\b[^>]*\bid=["\']' + re.escape(attr_id["id"]) + r'["\']', html)
+        if not match:
+            return None
+        end = html.find("</table>", match.start())
+        if end == -1:
+            return None
+        return html[match.start():end + len("</table>")].replace("<!--", "").replace("-->", "")
+
+    def _parse_fragment(self, fragment: str) -> pd.DataFrame:
+        table = lxml.html.fragment_fromstring(fragment)
+
+        # Extract headers
+        headers = []
+        table_header = table.find('thead')
+        if table_header is not None:
+            for header in table_header.iter('tr'):
+                headers = [el.text_content().strip() for el in header.iter('th')]
+
+        # Extract rows
+        rows = []
+        table_body = table.find('tbody')
+        if table_body is not None:
+            for row in table_body.iter('tr'):
+                rows.append([el.text_content().strip() for el in row.iter('td')])
+
+        return pd.DataFrame(rows, columns=headers[1:] if headers else None)
+
+    def _parse_with_soup(self, html: str, attr_id=None) -> pd.DataFrame:
         try:
-            html_content = response.text.replace("<!--", "").replace("-->", "")
+            html_content = html.replace("<!--", "").replace("-->", "")
             soup = BeautifulSoup(html_content, features="lxml")
             table = soup.find("table", attrs=attr_id)
             
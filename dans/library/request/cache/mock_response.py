@@ -1,3 +1,4 @@
+import json
 
 class MockResponse:
     
@@ -7,6 +8,8 @@ class MockResponse:
         self.json_data = json_data
     
     def json(self):
+        if self.json_data is None and self.text is not None:
+            return json.loads(self.text)
         return self.json_data
 
 class MockAPIResponse:
@@ -0,0 +1,115 @@
+"""Record/replay transport for requests"""
+import os
+import json
+import hashlib
+import pandas as pd
+
+from dans.library.parameters import TransportMode
+from dans.library.request.cache.mock_response import MockResponse, MockAPIResponse
+
+# Columns that nba_api returns as strings but pandas would otherwise read back as numbers
+FRAME_DTYPES = {"Game_ID": "str", "GAME_ID": "str", "gameId": "str",
+                "scoreAway": "object", "scoreHome": "object"}
+
+def request_identity(url: str = None, params=None, function=None, args=None) -> dict:
+    """Describes a request by what it asks for, ignoring headers and timeouts"""
+    if function is not None:
+        return {
+            "function": f"{function.__module__}.{function.__qualname__}",
+            "args": dict(args or {})
+        }
+    return {"url": url, "params": _canonical_params(params)}
+
+def request_key(identity: dict) -> str:
+    """Stable hash of a request identity"""
+    payload = json.dumps(identity, sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _canonical_params(params) -> list:
+    items = params.items() if isinstance(params, dict) else (params or ())
+    pairs = [sorted(item, key=str) if isinstance(item, set) else list(item) for item in items]
+    return sorted(pairs, key=str)
+
+def _json_default(value):
+    # numpy scalars (e.g. player ids read from csv files) hash like their python values
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+class Cassette:
+    """On-disk store of recorded responses, indexed by request key.
+
+    The index is only read the first time a response is played or recorded, so
+    importing the package never touches the recorded data.
+    """
+
+    mode = os.environ.get("DANS_TRANSPORT_MODE", TransportMode.default)
+    path = os.environ.get("DANS_CASSETTE_PATH",
+                          os.path.join(os.path.dirname(__file__), "cache"))
+    index_file = "cassette.json"
+
+    _index = None
+
+    @classmethod
+    def configure(cls, mode: str = None, path: str = None):
+        """Sets the transport mode and/or the cassette directory"""
+        if mode is not None:
+            if mode not in (TransportMode.off, TransportMode.record, TransportMode.replay):
+                raise ValueError(f"Unsupported transport mode: {mode}")
+            cls.mode = mode
+        if path is not None:
+            cls.path = path
+            cls._index = None
+
+    @classmethod
+    def play(cls, identity: dict):
+        """Returns the recorded response for a request"""
+        key = request_key(identity)
+        entry = cls._load_index().get(key)
+        if entry is None:
+            raise KeyError(f"No recorded response for request {identity}")
+
+        if entry["kind"] == "api":
+            return MockAPIResponse(data_frames=[
+                pd.read_csv(os.path.join(cls.path, frame), dtype=FRAME_DTYPES)
+                for frame in entry["frames"]
+            ])
+        with open(os.path.join(cls.path, entry["body"]), "r", encoding="utf-8") as file:
+            return MockResponse(status_code=entry["status_code"], text=file.read())
+
+    @classmethod
+    def record(cls, identity: dict, response):
+        """Stores a response so that it can be replayed later"""
+        key = request_key(identity)
+        os.makedirs(os.path.join(cls.path, "data"), exist_ok=True)
+
+        entry = {"request": identity}
+        if hasattr(response, "get_data_frames"):
+            entry["kind"] = "api"
+            entry["frames"] = []
+            for i, frame in enumerate(response.get_data_frames()):
+                name = f"data/{key}_{i}.txt"
+                frame.to_csv(os.path.join(cls.path, name), index=False)
+                entry["frames"].append(name)
+        else:
+            entry["kind"] = "http"
+            entry["status_code"] = response.status_code
+            entry["body"] = f"data/{key}.txt"
+            with open(os.path.join(cls.path, entry["body"]), "w", encoding="utf-8") as file:
+                file.write(response.text)
+
+        index = cls._load_index()
+        index[key] = entry
+        with open(os.path.join(cls.path, cls.index_file), "w", encoding="utf-8") as file:
+            json.dump(index, file, indent=1, default=_json_default)
+
+    @classmethod
+    def _load_index(cls) -> dict:
+        if cls._index is None:
+            index_path = os.path.join(cls.path, cls.index_file)
+            if os.path.exists(index_path):
+                with open(index_path, "r", encoding="utf-8") as file:
+                    cls._index = json.load(file)
+            else:
+                cls._index = {}
+        return cls._index
@@ -23,3 +23,10 @@ class DataSourceFactory:
                     return source
 
         raise ValueError(f"No handler found for URL: {url} or function: {function}")
+
+    @classmethod
+    def configure_sessions(cls, pool_size: int = None, retries: int = None,
+                           backoff_factor: float = None):
+        """Changes pooling/retry settings for every URL-based source"""
+        for source in cls._sources:
+            source.configure_session(pool_size, retries, backoff_factor)
@@ -1,12 +1,33 @@
 """NBA-Stats requests handler"""
 import requests
+import numpy as np
 import pandas as pd
 
 from dans.library.request.base import DataSource
 from dans.library.request import request_params
 
+# Column dtypes of each result set, by result set name. Columns without an entry are
+# decoded as the numpy dtype of their values.
+SCHEMAS = {
+    "PlayerGameLogs": {
+        "SEASON_YEAR": "category",
+        "PLAYER_ID": "int64",
+        "PLAYER_NAME": "category",
+        "NICKNAME": "category",
+        "TEAM_ID": "int64",
+        "TEAM_ABBREVIATION": "category",
+        "TEAM_NAME": "category",
+        "GAME_DATE": "datetime64[ns]",
+        "MATCHUP": "category",
+        "WL": "category",
+    }
+}
+RANK_DTYPE = "int32"
+
 class NBAStatsSource(DataSource):
     """Handler for NBA.com API requests"""
+
+    host = "stats.nba.com"
     
     def can_handle(self, url: str) -> bool:
         return "stats.nba.com" in url
@@ -25,16 +46,51 @@ class NBAStatsSource(DataSource):
             measure_type, per_mode, year, season_type
         )
     
-    def parse_response(self, response) -> pd.DataFrame:
+    def parse_response(self, response, columns: list[str] = None) -> pd.DataFrame:
+        """Decodes the first result set, keeping only `columns` if given"""
         if response.status_code != 200:
             print(f"{response.status_code} Error")
             return pd.DataFrame()
         
         try:
-            response_json = response.json()
-            data_frame = pd.DataFrame(response_json['resultSets'][0]['rowSet'])
-            if not data_frame.empty:
-                data_frame.columns = response_json['resultSets'][0]['headers']
-            return data_frame
+            result_set = response.json()['resultSets'][0]
+            headers, rows = result_set['headers'], result_set['rowSet']
         except (KeyError, IndexError):
             return pd.DataFrame()
+
+        if not rows:
+            return pd.DataFrame()
+
+        schema = SCHEMAS.get(result_set.get('name'), {})
+        wanted = set(columns) if columns is not None else set(headers)
+        # Transpose once, then build every column straight into its final dtype
+        return pd.DataFrame({
+            header: _decode(values, _dtype(schema, header))
+            for header, values in zip(headers, zip(*rows)) if header in wanted
+        })
+
+def _dtype(schema: dict, header: str):
+    if header in schema:
+        return schema[header]
+    if header.endswith("_RANK"):
+        return RANK_DTYPE
+    return None
+
+def _decode(values: tuple, dtype: str):
+    """Column of values as `dtype`, or as the numpy dtype of the values if `dtype` is None"""
+    if dtype == "category":
+        return pd.Categorical(values)
+    if dtype is not None and dtype.startswith("datetime64"):
+        return pd.to_datetime(list(values), format="ISO8601").astype(dtype)
+
+    sample = next((value for value in values if value is not None), None)
+    if isinstance(sample, str) or sample is None:
+        return np.array(values, dtype=object)
+    try:
+        if dtype is not None:
+            return np.fromiter(values, dtype=dtype, count=len(values))
+        array = np.array(values)
+    except (TypeError, ValueError):
+        return list(values)
+    # Numeric columns with missing values are left to pandas, which fills them with NaN
+    return array if array.dtype.kind in "biuf" else list(values)
@@ -0,0 +1,152 @@
+"""Per-host rate limiting"""
+import time
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+
+from dans.library.metrics import Metrics
+
+class TokenBucket:
+    """Token bucket whose refill rate adapts to the host's responses (AIMD).
+
+    Throttled responses halve the rate; every successful response adds back a
+    tenth of the configured rate, up to the configured rate.
+    """
+
+    decrease_factor = 0.5
+    increase_fraction = 0.1
+    min_rate_fraction = 0.05
+
+    def __init__(self, calls: int, period: float, burst: int = None):
+        self.max_rate = calls / period
+        self.rate = self.max_rate
+        self.capacity = burst if burst is not None else calls
+        self.tokens = float(self.capacity)
+        self.blocked_until = 0.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns how many seconds the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            return max(wait, self.blocked_until - now)
+
+    def throttled(self, retry_after: float = None):
+        """Backs off after a 429/503 response"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.rate * self.decrease_factor, self.max_rate * self.min_rate_fraction)
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def succeeded(self):
+        with self._lock:
+            self.rate = min(self.rate + self.max_rate * self.increase_fraction, self.max_rate)
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+class RateLimiter:
+    """Rate limiting functionality, with a separate budget for every host"""
+
+    # (calls, period in seconds) for each host. Hosts without an entry use `default`.
+    limits = {
+        "default": (19, 60),
+    }
+    throttle_statuses = (429, 503)
+
+    _buckets = {}
+    _waited = {}
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.waited = 0.0
+
+    @classmethod
+    def configure(cls, host: str, calls: int, period: float, burst: int = None):
+        """Sets the budget for a host"""
+        with cls._lock:
+            cls.limits = {**cls.limits, host: (calls, period)}
+            cls._buckets[host] = TokenBucket(calls, period, burst)
+
+    @classmethod
+    def bucket(cls, host: str) -> TokenBucket:
+        with cls._lock:
+            if host not in cls._buckets:
+                calls, period = cls.limits.get(host, cls.limits["default"])
+                cls._buckets[host] = TokenBucket(calls, period)
+            return cls._buckets[host]
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Current rate (calls/min) and total seconds waited for each host"""
+        with cls._lock:
+            return {host: {"rate": bucket.rate * 60, "waited": cls._waited.get(host, 0.0)}
+                    for host, bucket in cls._buckets.items()}
+
+    def acquire(self, host: str) -> float:
+        """Blocks until the host's budget allows another request"""
+        wait = self.bucket(host).reserve()
+        if wait > 0:
+            time.sleep(wait)
+        self._record_wait(host, wait)
+        return wait
+
+    async def acquire_async(self, host: str) -> float:
+        """Waits, without blocking the event loop, until the host's budget allows another request"""
+        wait = self.bucket(host).reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._record_wait(host, wait)
+        return wait
+
+    def make_request(self, host: str, func, *args, **kwargs):
+        """Calls `func` within the host's budget. Throttled responses back off the budget,
+        and are returned for the `RetryPolicy` to retry."""
+        self.acquire(host)
+        with Metrics.timer("http", host=host):
+            response = func(*args, **kwargs)
+        self._throttled(host, response)
+        return response
+
+    async def make_request_async(self, host: str, func, *args, **kwargs):
+        """Same as `make_request`, running the blocking call in a worker thread"""
+        await self.acquire_async(host)
+        with Metrics.timer("http", host=host):
+            response = await asyncio.to_thread(func, *args, **kwargs)
+        self._throttled(host, response)
+        return response
+
+    def _throttled(self, host: str, response) -> bool:
+        """Feeds a response back into the host's bucket"""
+        if getattr(response, "status_code", None) in self.throttle_statuses:
+            self.bucket(host).throttled(retry_after(response))
+            return True
+        self.bucket(host).succeeded()
+        return False
+
+    def _record_wait(self, host: str, wait: float):
+        Metrics.record("rate_limit_wait", max(wait, 0.0), host=host)
+        self.waited += wait
+        with self._lock:
+            self._waited[host] = self._waited.get(host, 0.0) + wait
+
+def retry_after(response) -> float:
+    """Seconds requested by a response's Retry-After header, if any"""
+    value = getattr(response, "headers", {}).get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
@@ -1,74 +1,147 @@
 """HTTP Request handler"""
-import requests
+import asyncio
 import pandas as pd
 
-from dans.library.request.base import RateLimiter, APISource
+from dans.library.metrics import Metrics
+from dans.library.parameters import TransportMode
+from dans.library.request.base import APISource
+from dans.library.request.cassette import Cassette, request_identity, request_key
 from dans.library.request.data_sources import DataSourceFactory
+from dans.library.request.rate_limiter import RateLimiter
+from dans.library.request.retry import RetryPolicy
+from dans.library.request.response_cache import ResponseCache
+from dans.library.request.single_flight import SingleFlight
+from dans.library.request.nba_stats import NBAStatsSource
 from dans.library.request.basketball_reference import BasketballReferenceSource
 
 class Request:
     """Simplified request class using modular architecture"""
     
-    def __init__(self, url: str = None, attr_id=None, function=None, args=None, **kwargs):
+    def __init__(self, url: str = None, attr_id=None, function=None, args=None,
+                 columns: list[str] = None, **kwargs):
         self.url = url
         self.attr_id = attr_id
+        self.columns = columns
         self.function = function
         self.args = args
         self.kwargs = kwargs
         self.source = DataSourceFactory.get_source(url, function, args)
         self.rate_limiter = RateLimiter()
+        self.retry_policy = RetryPolicy()
+        # Exception that made the last call return an empty DataFrame, if any
+        self.error = None
     
     def get_response(self) -> pd.DataFrame:
         """Get response using appropriate data source"""
-        
+        identity, func, kwargs = self._prepare()
+        self.error = None
+        try:
+            return SingleFlight.do(self._flight_key(identity),
+                                   lambda: self._parse(self._fetch(identity, func, **kwargs)))
+        except Exception as e:
+            self.error = e
+            print(f"{self._kind()} failed: {e}")
+            return pd.DataFrame()
+
+    async def get_response_async(self) -> pd.DataFrame:
+        """Same as `get_response`, but waits for the rate budget without blocking the event loop"""
+        identity, func, kwargs = self._prepare()
+
+        async def fetch_and_parse():
+            response = await self._fetch_async(identity, func, **kwargs)
+            return await asyncio.to_thread(self._parse, response)
+
+        self.error = None
+        try:
+            return await SingleFlight.do_async(self._flight_key(identity), fetch_and_parse)
+        except Exception as e:
+            self.error = e
+            print(f"{self._kind()} failed: {e}")
+            return pd.DataFrame()
+
+    def _prepare(self) -> tuple[dict, object, dict]:
+        """Identity, callable and keyword arguments of the request"""
         if self.kwargs and "year" in self.kwargs:
             self.kwargs["year"] = self._format_year(self.kwargs["year"])
         
         if self.args and "season" in self.args:
             self.args["season"] = self._format_year(self.args["season"])
-    
+
         # Handle API calls
         if isinstance(self.source, APISource):
-            return self._handle_function_call()
+            identity = request_identity(function=self.source.function, args=self.source.args)
+            return identity, self.source.function, self.source.args
 
         # Handle URL-based requests
-        return self._handle_url_request()
-    
-    def _handle_function_call(self) -> pd.DataFrame:
-        """Handle API calls with rate limiting"""
-        try:
-            response = self.rate_limiter.make_request(
-                self.source.function, 
-                **self.source.args
-            )
-            return self.source.parse_response(response)
-        except Exception as e:
-            print(f"Function call failed: {e}")
-            return pd.DataFrame()
-    
-    def _handle_url_request(self) -> pd.DataFrame:
-        """Handle URL-based requests with rate limiting"""
         headers = self.source.get_headers()
         params = self.source.get_params(url=self.url, **self.kwargs)
-        try:
-            response = self.rate_limiter.make_request(
-                requests.get,
-                url=self.url,
-                headers=headers,
-                params=params,
-                timeout=10
-            )
-            
+        identity = request_identity(url=self.url, params=params)
+        return identity, self.source.session.get, {
+            "url": self.url,
+            "headers": headers,
+            "params": params,
+            "timeout": 10
+        }
+
+    def _parse(self, response) -> pd.DataFrame:
+        with Metrics.timer("parse", host=self.source.host):
             # Pass attr_id for Basketball Reference
             if isinstance(self.source, BasketballReferenceSource):
                 return self.source.parse_response(response, self.attr_id)
-            else:
-                return self.source.parse_response(response)
-            
-                
-        except Exception as e:
-            print(f"Request failed: {e}")
-            return pd.DataFrame()
+            if isinstance(self.source, NBAStatsSource):
+                return self.source.parse_response(response, self.columns)
+            return self.source.parse_response(response)
+
+    def _flight_key(self, identity: dict) -> str:
+        # Requests for the same page share a fetch, but only share a parse for the same table
+        return request_key({"request": identity, "attr_id": self.attr_id, "columns": self.columns})
+
+    def _kind(self) -> str:
+        return "Function call" if isinstance(self.source, APISource) else "Request"
+
+    def _fetch(self, identity: dict, func, **kwargs):
+        """Replays, records or performs a request depending on the transport mode.
+        Transient failures are retried with backoff, other failures raise at once."""
+        response = self._lookup(identity)
+        cached = response is not None
+        if not cached:
+            response = self.retry_policy.call(lambda: self._check(
+                self.rate_limiter.make_request(self.source.host, func, **kwargs)))
+        self._store(identity, response, cached)
+        return response
+
+    async def _fetch_async(self, identity: dict, func, **kwargs):
+        response = await asyncio.to_thread(self._lookup, identity)
+        cached = response is not None
+        if not cached:
+            async def attempt():
+                return self._check(
+                    await self.rate_limiter.make_request_async(self.source.host, func, **kwargs))
+            response = await self.retry_policy.call_async(attempt)
+        await asyncio.to_thread(self._store, identity, response, cached)
+        return response
+
+    def _check(self, response):
+        Metrics.count("http_response", host=self.source.host,
+                      status_code=getattr(response, "status_code", None))
+        return RetryPolicy.check(response)
+
+    def _lookup(self, identity: dict):
+        """Recorded or cached response for a request, if there is one"""
+        if Cassette.mode == TransportMode.replay:
+            return Cassette.play(identity)
+        if ResponseCache.enabled:
+            with Metrics.timer("response_cache_get", host=self.source.host) as fields:
+                response = ResponseCache.get(identity)
+                fields["hit"] = response is not None
+            return response
+        return None
+
+    def _store(self, identity: dict, response, cached: bool):
+        if ResponseCache.enabled and not cached:
+            ResponseCache.put(identity, response)
+        if Cassette.mode == TransportMode.record:
+            Cassette.record(identity, response)
 
     def _format_year(self, year):
         start_year = year - 1
@@ -0,0 +1,171 @@
+"""Persistent cache of raw responses"""
+import io
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import datetime
+import threading
+from urllib.parse import urlparse
+import pandas as pd
+
+from dans.library.storage import cache_dir
+from dans.library.request.cassette import FRAME_DTYPES, request_key
+from dans.library.request.cache.mock_response import MockResponse, MockAPIResponse
+
+def current_season(today: datetime.date = None) -> int:
+    """Season (by end year) that can still change. Seasons are complete once July starts."""
+    today = today or datetime.date.today()
+    return today.year + 1 if today.month >= 7 else today.year
+
+def request_season(identity: dict):
+    """Season (by end year) that a request asks for, or None if it can't be told"""
+    args = identity.get("args", {})
+    params = dict((pair[0], pair[-1]) for pair in identity.get("params", []))
+    season = args.get("season") or params.get("Season")
+    if isinstance(season, str) and re.fullmatch(r"\d{4}-\d{2}", season):
+        return int(season[:4]) + 1
+
+    game_id = args.get("game_id")
+    if isinstance(game_id, str) and len(game_id) == 10:
+        start_year = int(game_id[3:5])
+        return (1900 if start_year >= 46 else 2000) + start_year + 1
+
+    # Basketball-reference pages put the season's end year in their path
+    match = re.search(r"/(\d{4})(/|$)", urlparse(identity.get("url") or "").path)
+    if match:
+        return int(match.group(1))
+    return None
+
+def request_endpoint(identity: dict) -> str:
+    """Name used to look up a TTL policy: the nba_api endpoint or the URL's host"""
+    if "function" in identity:
+        return identity["function"].rsplit(".", 1)[-1]
+    return urlparse(identity["url"]).netloc
+
+class ResponseCache:
+    """SQLite-backed cache of responses.
+
+    Responses for past seasons never expire. Responses for the current season, or
+    for requests whose season can't be told, expire after the TTL of their endpoint.
+    """
+
+    enabled = True
+    path = os.path.join(cache_dir(), "responses.sqlite")
+
+    # Seconds until a current-season response expires, by endpoint name
+    ttl = {
+        "default": 6 * 60 * 60,
+        "PlayByPlayV3": 60 * 60,
+        "PlayByPlayV2": 60 * 60,
+        "GameRotation": 60 * 60,
+    }
+
+    hits = 0
+    misses = 0
+
+    _connections = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, enabled: bool = None, path: str = None, ttl: dict = None):
+        """Enables/disables the cache, moves it, or overrides TTL policies"""
+        if enabled is not None:
+            cls.enabled = enabled
+        if ttl is not None:
+            cls.ttl = {**cls.ttl, **ttl}
+        if path is not None and path != cls.path:
+            cls.close()
+            cls.path = path
+
+    @classmethod
+    def get(cls, identity: dict):
+        """Returns the stored response for a request, or None"""
+        key = request_key(identity)
+        with cls._lock:
+            row = cls._connect().execute(
+                "SELECT kind, status_code, body, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[3] is not None and row[3] < time.time()):
+                cls.misses += 1
+                return None
+            cls.hits += 1
+
+        kind, status_code, body, _ = row
+        body = zlib.decompress(body).decode("utf-8")
+        if kind == "api":
+            return MockAPIResponse(data_frames=[
+                pd.read_csv(io.StringIO(frame), dtype=FRAME_DTYPES) for frame in json.loads(body)
+            ])
+        return MockResponse(status_code=status_code, text=body)
+
+    @classmethod
+    def put(cls, identity: dict, response):
+        """Stores a successful response"""
+        if hasattr(response, "get_data_frames"):
+            kind, status_code = "api", None
+            body = json.dumps([frame.to_csv(index=False) for frame in response.get_data_frames()])
+        elif response.status_code == 200:
+            kind, status_code, body = "http", response.status_code, response.text
+        else:
+            return
+
+        now = time.time()
+        season = request_season(identity)
+        if season is not None and season < current_season():
+            expires_at = None
+        else:
+            endpoint = request_endpoint(identity)
+            expires_at = now + cls.ttl.get(endpoint, cls.ttl["default"])
+
+        with cls._lock:
+            connection = cls._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (request_key(identity), request_endpoint(identity), kind, status_code,
+                 zlib.compress(body.encode("utf-8")), now, expires_at))
+            connection.commit()
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Hit/miss counters since the process started"""
+        total = cls.hits + cls.misses
+        return {"hits": cls.hits, "misses": cls.misses,
+                "hit_rate": cls.hits / total if total else 0.0}
+
+    @classmethod
+    def clear(cls, expired_only: bool = False):
+        """Deletes stored responses"""
+        with cls._lock:
+            connection = cls._connect()
+            if expired_only:
+                connection.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+            else:
+                connection.execute("DELETE FROM responses")
+            connection.commit()
+
+    @classmethod
+    def close(cls):
+        with cls._lock:
+            connection = cls._connections.pop((cls.path, os.getpid()), None)
+            if connection is not None:
+                connection.close()
+
+    @classmethod
+    def _connect(cls) -> sqlite3.Connection:
+        """Connection of this process to the database at `path`, created on first use.
+        Forked processes open their own instead of using the parent's."""
+        key = (cls.path, os.getpid())
+        connection = cls._connections.get(key)
+        if connection is None:
+            os.makedirs(os.path.dirname(cls.path), exist_ok=True)
+            connection = sqlite3.connect(cls.path, check_same_thread=False)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, endpoint TEXT, "
+                "kind TEXT NOT NULL, status_code INTEGER, body BLOB NOT NULL, "
+                "created_at REAL NOT NULL, expires_at REAL)")
+            connection.commit()
+            cls._connections[key] = connection
+        return connection
@@ -0,0 +1,81 @@
+"""Retries with exponential backoff"""
+import time
+import random
+import asyncio
+import requests
+
+from dans.library.metrics import Metrics
+
+class RequestError(Exception):
+    """A request that failed, either for good or for a reason that may go away on its own"""
+
+    def __init__(self, message: str, transient: bool = False):
+        super().__init__(message)
+        self.transient = transient
+
+class RetryPolicy:
+    """Retries transient failures with exponential backoff and jitter.
+
+    Connection errors, timeouts and `408`/`429`/`5xx` responses are transient.
+    Anything else (e.g. a `404`, or a response that can't be parsed) fails at once.
+    """
+
+    max_attempts = 4
+    base_delay = 2.0
+    max_delay = 60.0
+    transient_statuses = (408, 429, 500, 502, 503, 504)
+    transient_errors = (
+        requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout,
+        requests.exceptions.ChunkedEncodingError
+    )
+
+    @classmethod
+    def configure(cls, max_attempts: int = None, base_delay: float = None, max_delay: float = None):
+        if max_attempts is not None:
+            cls.max_attempts = max_attempts
+        if base_delay is not None:
+            cls.base_delay = base_delay
+        if max_delay is not None:
+            cls.max_delay = max_delay
+
+    @classmethod
+    def is_transient(cls, error: Exception) -> bool:
+        if isinstance(error, RequestError):
+            return error.transient
+        return isinstance(error, cls.transient_errors)
+
+    @classmethod
+    def check(cls, response):
+        """Raises a `RequestError` for HTTP responses other than `200`"""
+        status_code = getattr(response, "status_code", None)
+        if status_code is not None and status_code != 200:
+            raise RequestError(f"{status_code} Error",
+                               transient=status_code in cls.transient_statuses)
+        return response
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait after the given (0-based) failed attempt"""
+        return min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def call(self, func):
+        """Returns `func()`, calling it again after transient failures"""
+        for attempt in range(self.max_attempts):
+            try:
+                return func()
+            except Exception as e:
+                if not self.is_transient(e) or attempt == self.max_attempts - 1:
+                    raise
+                Metrics.count("retry", error=str(e))
+                time.sleep(self.delay(attempt))
+
+    async def call_async(self, func):
+        """Same as `call` for a coroutine function"""
+        for attempt in range(self.max_attempts):
+            try:
+                return await func()
+            except Exception as e:
+                if not self.is_transient(e) or attempt == self.max_attempts - 1:
+                    raise
+                Metrics.count("retry", error=str(e))
+                await asyncio.sleep(self.delay(attempt))
@@ -0,0 +1,80 @@
+"""Deduplication of identical in-flight requests"""
+import asyncio
+import threading
+from concurrent.futures import Future
+import pandas as pd
+
+from dans.library.request.cache.mock_response import MockAPIResponse
+
+class SingleFlight:
+    """Lets concurrent identical requests share one fetch and one parsed result.
+
+    The first caller for a key does the work; callers that arrive while it is in
+    flight wait for it and get their own copy of the result, since endpoints are
+    free to modify the DataFrames they are given. They copy a private copy of it,
+    so the first caller can modify its result while they do.
+    """
+
+    shared = 0
+
+    _calls = {}
+    _followers = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def do(cls, key: str, func):
+        """Returns `func()`, or the result of an identical call that is already running"""
+        future, leader = cls._begin(key)
+        if not leader:
+            return _copy(future.result())
+        try:
+            result = func()
+        except BaseException as e:
+            cls._finish(key, future, error=e)
+            raise
+        cls._finish(key, future, result=result)
+        return result
+
+    @classmethod
+    async def do_async(cls, key: str, func):
+        """Same as `do` for a coroutine function"""
+        future, leader = cls._begin(key)
+        if not leader:
+            return _copy(await asyncio.wrap_future(future))
+        try:
+            result = await func()
+        except BaseException as e:
+            cls._finish(key, future, error=e)
+            raise
+        cls._finish(key, future, result=result)
+        return result
+
+    @classmethod
+    def _begin(cls, key: str) -> tuple[Future, bool]:
+        with cls._lock:
+            future = cls._calls.get(key)
+            if future is not None:
+                cls.shared += 1
+                cls._followers[key] = cls._followers.get(key, 0) + 1
+                return future, False
+            future = Future()
+            cls._calls[key] = future
+            return future, True
+
+    @classmethod
+    def _finish(cls, key: str, future: Future, result=None, error: BaseException = None):
+        with cls._lock:
+            del cls._calls[key]
+            followers = cls._followers.pop(key, 0)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            # Nobody can join once the key is removed, so only copy for callers that did
+            future.set_result(_copy(result) if followers else result)
+
+def _copy(result):
+    if isinstance(result, pd.DataFrame):
+        return result.copy()
+    if hasattr(result, "get_data_frames"):
+        return MockAPIResponse(data_frames=[frame.copy() for frame in result.get_data_frames()])
+    return result
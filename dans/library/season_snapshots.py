@@ -0,0 +1,77 @@
+"""League-wide season snapshots"""
+import os
+import time
+import asyncio
+import datetime
+import pandas as pd
+
+from dans.library.storage import atomic_write, cache_dir
+from dans.library.request.request import Request
+from dans.library.request.response_cache import current_season
+
+class SeasonSnapshotStore:
+    """Stores the league-wide `playergamelogs` table of a season in a Parquet file.
+
+    One file is kept per season, season type, measure type and per mode, so the
+    logs of any number of players in a season cost a single request. Snapshots of
+    the current season are refetched once they are older than `ttl` seconds.
+    """
+
+    url = 'https://stats.nba.com/stats/playergamelogs'
+    path = os.path.join(cache_dir(), "snapshots")
+    ttl = 6 * 60 * 60
+
+    def get(self, season: int, season_type: str, measure_type: str = None,
+            per_mode: str = None, columns: list[str] = None) -> pd.DataFrame:
+        """League-wide game logs for a season, with only `columns` if given.
+        Returns an empty DataFrame if the request fails."""
+        file = self._file(season, season_type, measure_type, per_mode)
+        if self._is_fresh(file, season):
+            return pd.read_parquet(file, columns=columns)
+
+        table = self._request(season, season_type, measure_type, per_mode).get_response()
+        self._write(file, table)
+        return self._project(table, columns)
+
+    async def get_async(self, season: int, season_type: str, measure_type: str = None,
+                        per_mode: str = None, columns: list[str] = None) -> pd.DataFrame:
+        """Same as `get`, requesting the season concurrently with other coroutines"""
+        file = self._file(season, season_type, measure_type, per_mode)
+        if self._is_fresh(file, season):
+            return await asyncio.to_thread(pd.read_parquet, file, columns=columns)
+
+        table = await self._request(season, season_type, measure_type, per_mode).get_response_async()
+        await asyncio.to_thread(self._write, file, table)
+        return self._project(table, columns)
+
+    def _request(self, season: int, season_type: str, measure_type: str, per_mode: str) -> Request:
+        return Request(
+            url=self.url,
+            year=season,
+            season_type=season_type,
+            measure_type=measure_type,
+            per_mode=per_mode
+        )
+
+    def _file(self, season: int, season_type: str, measure_type: str, per_mode: str) -> str:
+        name = "_".join([str(season), season_type, measure_type or "Base", per_mode or "Default"])
+        return os.path.join(self.path, name.replace(" ", "") + ".parquet")
+
+    def _is_fresh(self, file: str, season: int) -> bool:
+        if not os.path.exists(file):
+            return False
+        written = os.path.getmtime(file)
+        # Only a snapshot written after its season ended is complete
+        if season < current_season(datetime.date.fromtimestamp(written)):
+            return True
+        return time.time() - written < self.ttl
+
+    def _project(self, table: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+        # The snapshot keeps every column, so only the returned table is projected
+        if columns is None or table.empty:
+            return table
+        return table[columns]
+
+    def _write(self, file: str, table: pd.DataFrame):
+        if not table.empty:
+            atomic_write(file, lambda tmp_path: table.to_parquet(tmp_path, index=False))
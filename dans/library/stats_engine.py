@@ -4,6 +4,7 @@ Stat processing classes
 from abc import ABC, abstractmethod
 import pandas as pd
 
+from dans.library.metrics import Metrics
 from dans.library.parameters import DataFormat
 
 class StatsEngine:
@@ -17,9 +18,10 @@ class StatsEngine:
         if not format:
             return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
         
-        box_score_stats = format.aggregate(logs)
-        opp_stats = OppAggregator().aggregate(logs)
-        eff_stats = EfficiencyCalculator().calculate_effiency(logs, adj_def)
+        with Metrics.timer("stats_engine", data_format=str(data_format), rows=len(logs)):
+            box_score_stats = format.aggregate(logs)
+            opp_stats = OppAggregator().aggregate(logs)
+            eff_stats = EfficiencyCalculator().calculate_effiency(logs, adj_def)
         
         return box_score_stats, opp_stats, eff_stats
 
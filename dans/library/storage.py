@@ -0,0 +1,17 @@
+'''Locations of the package's persistent stores.'''
+import os
+
+def cache_dir() -> str:
+    '''Directory for persistent stores. Set `DANS_CACHE_DIR` to move it.'''
+    return os.environ.get("DANS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "dans"))
+
+def atomic_write(path: str, write):
+    '''Calls `write(tmp_path)` and moves the result into place, so readers never see a partial file'''
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
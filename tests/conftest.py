@@ -0,0 +1,11 @@
+'''Test configuration: every request is answered from the recorded cassette, and
+persistent stores are kept in a temporary directory.'''
+import os
+import tempfile
+
+os.environ["DANS_CACHE_DIR"] = tempfile.mkdtemp(prefix="dans-tests-")
+
+from dans.library.parameters import TransportMode
+from dans.library.request.cassette import Cassette
+
+Cassette.configure(mode=TransportMode.replay)
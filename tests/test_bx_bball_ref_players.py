@@ -1,10 +1,12 @@
 '''Testing boxscore player methods (BBall-Ref only).'''
+import asyncio
 import unittest
 import pandas as pd
 
 from dans.endpoints.boxscore.bxplayerstats import BXPlayerStats
 from dans.endpoints.boxscore.bxplayerlogs import BXPlayerLogs
 from dans.library.parameters import DataFormat, SeasonType
+from dans.library.bx_possessions import BBallRefPossCount
 
 
 class TestBXBRPlayers(unittest.TestCase):
@@ -45,5 +47,12 @@ class TestBXBRPlayers(unittest.TestCase):
 
         self.assertEqual(round(pace_adj_stats["PTS"].loc[0], 1), 26.6)
 
+    def test_async_matches_sync(self):
+        player_logs = BXPlayerLogs("Kobe Bryant", year_range=[2003, 2003], season_type=SeasonType.playoffs)
+        logs = player_logs.bball_ref()
+        pd.testing.assert_frame_equal(asyncio.run(player_logs.bball_ref_async()), logs)
+        pd.testing.assert_frame_equal(asyncio.run(BBallRefPossCount().count_async(logs)),
+                                      BBallRefPossCount().count(logs))
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,10 +1,17 @@
 '''Testing boxscore player methods (NBA-Stats only).'''
+import os
+import asyncio
+import datetime
+import tempfile
 import unittest
+from unittest import mock
 import pandas as pd
 
 from dans.endpoints.boxscore.bxplayerstats import BXPlayerStats
 from dans.endpoints.boxscore.bxplayerlogs import BXPlayerLogs
 from dans.library.parameters import DataFormat, SeasonType
+from dans.library.bx_possessions import NBAStatsPossCount
+from dans.library.season_snapshots import SeasonSnapshotStore
 
 class TestBXNSPlayers(unittest.TestCase):
     '''Tests for each boxscore player endpoint: NBA-Stats only'''
@@ -28,5 +35,64 @@ class TestBXNSPlayers(unittest.TestCase):
         self.assertEqual(round(per_game_stats["PTS"].loc[0], 1), 32.3)
         self.assertEqual(round(per_poss_stats["PTS"].loc[0], 1), 38.7)
 
+    def test_async_matches_sync(self):
+        player_logs = BXPlayerLogs("Stephen Curry", year_range=[2015, 2017], season_type=SeasonType.playoffs)
+        logs = player_logs.nba_stats()
+        pd.testing.assert_frame_equal(asyncio.run(player_logs.nba_stats_async()), logs)
+
+        logs = BXPlayerLogs("Kobe Bryant", year_range=[2003, 2003], season_type=SeasonType.playoffs).nba_stats()
+        pd.testing.assert_frame_equal(asyncio.run(NBAStatsPossCount().count_async(logs)),
+                                      NBAStatsPossCount().count(logs))
+
+    def test_batch_matches_single_player(self):
+        names = ["Stephen Curry", "Klay Thompson", "Kevin Durant"]
+        batch = BXPlayerLogs.nba_stats_batch(names, year_range=[2015, 2017], season_type=SeasonType.playoffs)
+
+        self.assertListEqual(list(batch), names)
+        for name in names:
+            logs = BXPlayerLogs(name, year_range=[2015, 2017], season_type=SeasonType.playoffs).nba_stats()
+            pd.testing.assert_frame_equal(batch[name], logs)
+        self.assertEqual(batch["Stephen Curry"]['PTS'].sum(), 1523)
+
+    def test_normalized_names_use_the_site_spelling(self):
+        expected = BXPlayerLogs("Stephen Curry", year_range=[2015, 2017], season_type=SeasonType.playoffs).nba_stats()
+        player_logs = BXPlayerLogs("stephen curry", year_range=[2015, 2017], season_type=SeasonType.playoffs)
+        self.assertEqual(player_logs.name, "Stephen Curry")
+        pd.testing.assert_frame_equal(player_logs.nba_stats(), expected)
+
+        batch = BXPlayerLogs.nba_stats_batch(["stephen curry"], year_range=[2015, 2017], season_type=SeasonType.playoffs)
+        pd.testing.assert_frame_equal(batch["stephen curry"], expected)
+
+    def test_failed_season_keeps_loaded_seasons(self):
+        # 2018 was never recorded, so its request fails
+        player_logs = BXPlayerLogs("Stephen Curry", year_range=[2015, 2018], season_type=SeasonType.playoffs)
+        self.assertTrue(player_logs.nba_stats().empty)
+        self.assertIn("[2018]", player_logs.error)
+
+        store = SeasonSnapshotStore()
+        for year in range(2015, 2018):
+            self.assertTrue(os.path.exists(store._file(year, SeasonType.playoffs, None, "PerGame")))
+
+    def test_partial_snapshot_is_refetched_after_the_season(self):
+        store = SeasonSnapshotStore()
+        store.path = tempfile.mkdtemp()
+        file = store._file(2024, SeasonType.regular_season, None, None)
+        store._write(file, pd.DataFrame({"PLAYER_ID": [1], "PTS": [10]}))
+        mid_season = datetime.datetime(2024, 1, 15).timestamp()
+        after_season = datetime.datetime(2024, 8, 1).timestamp()
+        os.utime(file, (mid_season, mid_season))
+
+        table = pd.DataFrame({"PLAYER_ID": [1], "PTS": [30]})
+        with mock.patch("dans.library.season_snapshots.time.time", return_value=datetime.datetime(2024, 10, 1).timestamp()), \
+                mock.patch.object(SeasonSnapshotStore, "_request") as request:
+            request.return_value.get_response.return_value = table
+            self.assertEqual(store.get(2024, SeasonType.regular_season)["PTS"].tolist(), [30])
+            self.assertEqual(request.call_count, 1)
+
+            # Written after the season ended, so it is complete and kept
+            os.utime(file, (after_season, after_season))
+            self.assertEqual(store.get(2024, SeasonType.regular_season)["PTS"].tolist(), [30])
+            self.assertEqual(request.call_count, 1)
+
 if __name__ == '__main__':
     unittest.main()
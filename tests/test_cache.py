@@ -0,0 +1,107 @@
+'''Testing the play-by-play stats cache.'''
+import os
+import sqlite3
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+from dans.library.cache import Cache
+
+# Logs computed before cached rows were versioned, used as sample rows
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "dans", "data", "cache.csv")
+
+class TestCache(unittest.TestCase):
+    '''Tests for the SQLite cache of player game stats'''
+
+    def setUp(self):
+        self.original_path = Cache.path
+        Cache.configure(path=os.path.join(tempfile.mkdtemp(), "cache.sqlite"))
+
+    def tearDown(self):
+        Cache.configure(path=self.original_path)
+
+    def test_lookup(self):
+        # A new database is empty
+        self.assertListEqual(Cache().game_ids(), [])
+
+        sample = _sample()
+        Cache().insert_logs(sample)
+        game_ids = sample.loc[sample["PLAYER_ID"] == 977, "GAME_ID"].tolist()
+        expected = sample[sample["PLAYER_ID"] == 977].sort_values(by="GAME_ID", ignore_index=True)
+
+        logs = Cache().lookup_logs(977, game_ids + ["0000000000"])
+        pd.testing.assert_frame_equal(logs, expected)
+        self.assertTrue(Cache().lookup_logs(977, ["0000000000"]).empty)
+
+    def test_insert_replaces_rows(self):
+        sample = _sample()
+        row = sample[sample["PLAYER_ID"] == 977].iloc[[0]].assign(PLAYER_ID=1, PTS=99.0, rDRTG=None)
+        Cache().insert_logs(pd.concat([row, row.assign(GAME_ID="0000000001")]))
+        Cache().insert_logs(row.assign(PTS=12.0))
+
+        logs = Cache().lookup_logs(1, [row["GAME_ID"].iloc[0], "0000000001"])
+        # Ordered by GAME_ID
+        self.assertListEqual(logs["PTS"].tolist(), [99.0, 12.0])
+        self.assertTrue(logs["rDRTG"].isna().all())
+        self.assertEqual(logs["FGM"].dtype, "int64")
+
+        # A missing count is read back as NaN
+        Cache().insert_logs(row.assign(PLAYER_ID=2, FGM=None))
+        logs = Cache().lookup_logs(2, [row["GAME_ID"].iloc[0]])
+        self.assertTrue(logs["FGM"].isna().all())
+        self.assertEqual(logs["FGA"].tolist(), row["FGA"].tolist())
+
+    def test_versioned_rows(self):
+        row = _sample().iloc[[0]].assign(PLAYER_ID=1)
+        game_id = row["GAME_ID"].iloc[0]
+        Cache().insert_logs(row.assign(VERSION="a", INPUTS="x"))
+        Cache().insert_logs(row.assign(PLAYER_ID=977))
+
+        self.assertEqual(len(Cache().lookup_logs(1, [game_id], version="a")), 1)
+        self.assertTrue(Cache().lookup_logs(1, [game_id], version="b").empty)
+        self.assertNotIn("VERSION", Cache().lookup_logs(1, [game_id]).columns)
+
+        # Rows without a version are stale for every version
+        stale = Cache().stale("a")
+        self.assertNotIn(1, stale["PLAYER_ID"].tolist())
+        self.assertIn(977, stale["PLAYER_ID"].tolist())
+        self.assertIn(1, Cache().stale("b")["PLAYER_ID"].tolist())
+        self.assertIn(1, Cache().stale("a", inputs={game_id: "y"})["PLAYER_ID"].tolist())
+        self.assertNotIn(1, Cache().stale("a", inputs={game_id: "x"})["PLAYER_ID"].tolist())
+
+    def test_unversioned_tables_are_migrated(self):
+        connection = sqlite3.connect(Cache.path)
+        connection.execute("CREATE TABLE logs (PLAYER_ID INTEGER, SEASON INTEGER, GAME_ID TEXT, "
+                           "PRIMARY KEY (PLAYER_ID, GAME_ID))")
+        connection.execute("INSERT INTO logs VALUES (1, 2003, '0040200221')")
+        connection.commit()
+        connection.close()
+
+        self.assertListEqual(Cache().game_ids(), ["0040200221"])
+        self.assertListEqual(Cache().stale("a")["PLAYER_ID"].tolist(), [1])
+
+    def test_processes_share_the_cache(self):
+        # Every process creates the database if needed, then inserts its own rows and
+        # rows that the other processes insert as well
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(executor.map(_insert_player, [Cache.path] * 4, range(1, 5)))
+
+        game_ids = [f"{i:010d}" for i in range(50)]
+        for player_id in range(1, 5):
+            self.assertEqual(len(Cache().lookup_logs(player_id, game_ids)), 50)
+        self.assertEqual(len(Cache().lookup_logs(0, game_ids)), 50)
+        self.assertEqual(len(Cache().game_ids()), 50)
+
+def _insert_player(path: str, player_id: int):
+    Cache.configure(path=path)
+    row = _sample().iloc[[0]]
+    for i in range(50):
+        Cache().insert_logs(pd.concat([row.assign(PLAYER_ID=player_id, GAME_ID=f"{i:010d}"),
+                                       row.assign(PLAYER_ID=0, GAME_ID=f"{i:010d}")]))
+
+def _sample() -> pd.DataFrame:
+    return pd.read_csv(SAMPLE_PATH, dtype={"GAME_ID": "str"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+'''Testing the raw play-by-play store.'''
+import tempfile
+import unittest
+from unittest import mock
+
+from dans.library.game_store import GameStore
+from dans.library.nba_api_client import NBAApiClient
+from dans.library.request.request import Request
+from dans.library.request.response_cache import current_season
+
+class TestGameStore(unittest.TestCase):
+    '''Tests for storing finished games by GAME_ID'''
+
+    def setUp(self):
+        self.original_path = GameStore.path
+        GameStore.configure(path=tempfile.mkdtemp())
+
+    def tearDown(self):
+        GameStore.configure(path=self.original_path)
+
+    def test_game_is_requested_once(self):
+        with mock.patch.object(GameStore, "get", autospec=True, side_effect=GameStore.get) as get:
+            game = NBAApiClient().get_game("0040200221")
+        # A missing game is looked up once, not again for each endpoint
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(len(game["rotations"]), 2)
+        self.assertIsNotNone(GameStore().get("0040200221"))
+
+        with mock.patch.object(Request, "get_response") as get_response:
+            stored = NBAApiClient().get_game("0040200221")
+            get_response.assert_not_called()
+        self.assertListEqual(list(stored["events"]["description"]), list(game["events"]["description"]))
+        self.assertListEqual(list(stored["rotations"][0]["PERSON_ID"]),
+                             list(game["rotations"][0]["PERSON_ID"]))
+
+    def test_unfinished_games_are_not_stored(self):
+        events = NBAApiClient().get_game("0040200221")["events"]
+        # Pretend the game is from the current season
+        game_id = f"002{(current_season() - 1) % 100:02d}00001"
+        self.assertFalse(GameStore().is_finished(game_id, {"PlayByPlay": [events.iloc[:-1]]}))
+        self.assertTrue(GameStore().is_finished(game_id, {"PlayByPlay": [events]}))
+        self.assertTrue(GameStore().is_finished("0040200221", {"PlayByPlay": [events.iloc[:-1]]}))
+
+if __name__ == '__main__':
+    unittest.main()
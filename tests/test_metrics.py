@@ -0,0 +1,92 @@
+'''Testing the pipeline's instrumentation.'''
+import os
+import json
+import tempfile
+import unittest
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+import pandas as pd
+
+from dans.endpoints.playbyplay.pbpplayerstats import PBPPlayerStats
+from dans.library.cache import Cache
+from dans.library.metrics import JSONLinesSink, MemorySink, Metrics
+from dans.library.request.cache.mock_response import MockResponse
+from dans.library.request.retry import RetryPolicy
+
+class TestMetrics(unittest.TestCase):
+    '''Tests for the metrics sinks and the events of each stage'''
+
+    def setUp(self):
+        self.sink = Metrics.sink
+        self.memory = MemorySink()
+        Metrics.configure(sink=self.memory)
+
+    def tearDown(self):
+        Metrics.configure(sink=self.sink)
+
+    def test_stage_events(self):
+        with mock.patch.object(Cache, "_insert_logs"):
+            PBPPlayerStats.load_games(["0040200221"])
+
+        summary = self.memory.summary()
+        for stage in ["prepare", "count", "parse", "game_store_get", "cache_insert"]:
+            self.assertIn(stage, summary.index)
+        self.assertEqual(summary.loc["prepare", "CALLS"], 1)
+        self.assertEqual(summary["FAILED"].sum(), 0)
+
+        # Progress bars are replaced by progress events
+        progress = [event for event in self.memory.events if event["type"] == "progress"]
+        self.assertEqual(progress[-1]["stage"], "pbp_games")
+        self.assertEqual((progress[-1]["done"], progress[-1]["total"]), (1, 1))
+        self.assertTrue(progress[-1]["finished"])
+
+    def test_failed_stage_and_counts(self):
+        responses = iter([MockResponse(status_code=503), MockResponse(status_code=200)])
+        with mock.patch.object(RetryPolicy, "base_delay", 0):
+            RetryPolicy().call(lambda: RetryPolicy.check(next(responses)))
+        self.assertEqual(self.memory.counts()["retry"], 1)
+
+        with self.assertRaises(ValueError):
+            with Metrics.timer("parse", host="stats.nba.com"):
+                raise ValueError()
+        self.assertTrue(self.memory.events[-1]["failed"])
+
+    def test_json_lines_sink(self):
+        path = os.path.join(tempfile.mkdtemp(), "metrics.jsonl")
+        sink = JSONLinesSink(path)
+        Metrics.configure(sink=[self.memory, sink])
+        with Metrics.timer("prepare", game_id="0040200221") as fields:
+            fields["rows"] = 10
+        Metrics.count("http_response", status_code=200)
+        sink.close()
+
+        with open(path, "r", encoding="utf-8") as file:
+            events = [json.loads(line) for line in file]
+        self.assertEqual([event["type"] for event in events], ["stage", "count"])
+        self.assertEqual((events[0]["game_id"], events[0]["rows"]), ("0040200221", 10))
+        self.assertEqual(len(self.memory.events), 2)
+
+        Metrics.configure(enabled=False)
+        Metrics.count("http_response")
+        Metrics.configure(enabled=True)
+        self.assertEqual(len(self.memory.events), 2)
+        self.assertEqual(pd.read_json(path, lines=True).shape[0], 2)
+
+    def test_forked_workers_reopen_sinks(self):
+        path = os.path.join(tempfile.mkdtemp(), "metrics.jsonl")
+        sink = JSONLinesSink(path)
+        Metrics.configure(sink=sink)
+        Metrics.count("parent")
+        with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("fork"),
+                                 initializer=Metrics.reopen) as executor:
+            list(executor.map(_count, range(4)))
+        Metrics.count("parent")
+        sink.close()
+
+        names = pd.read_json(path, lines=True)["name"].tolist()
+        self.assertEqual(names.count("parent"), 2)
+        self.assertEqual(names.count("worker"), 4)
+
+def _count(_):
+    Metrics.count("worker")
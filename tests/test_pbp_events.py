@@ -0,0 +1,34 @@
+'''Testing play-by-play event classification.'''
+import unittest
+
+from dans.library.pbp_events import BOX_STATS, count_box_stats, estimate_possessions
+from dans.library.pbp_processor import PBPProcessor
+
+class TestPBPEvents(unittest.TestCase):
+    '''Tests for counting stats from classified events'''
+
+    def test_classified_counts(self):
+        processor = PBPProcessor()
+        prepared = processor.prepare("0040200221")
+        player = processor.for_player(prepared, 977)
+
+        stats = count_box_stats(player["events"], 977)
+        self.assertListEqual(list(stats), BOX_STATS)
+        self.assertDictEqual(stats, {"PTS": 37.0, "FGM": 16, "FGA": 38, "FG3M": 3, "FG3A": 4,
+                                     "FTM": 2, "FTA": 2, "REB": 4, "AST": 2, "STL": 0, "BLK": 0,
+                                     "TOV": 5, "STOV": 3})
+        # Ids passed as strings count the same stats
+        self.assertDictEqual(count_box_stats(player["events"], "977"), stats)
+        self.assertAlmostEqual(estimate_possessions(player["events"], player["team_id"],
+                                                    player["team_name"]), 88.5888)
+
+    def test_unclassified_frames(self):
+        # Frames without an `events` column are classified on the fly
+        processor = PBPProcessor()
+        player = processor.for_player(processor.prepare("0040200221"), 977)
+        events = player["events"].drop(columns="events")
+
+        self.assertDictEqual(count_box_stats(events, 977), count_box_stats(player["events"], 977))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+'''Testing the play-by-play lineups endpoint (NBA-Stats only).'''
+import unittest
+
+from dans.endpoints.playbyplay.pbplineups import PBPLineups
+
+class TestPBPLineups(unittest.TestCase):
+    '''Tests for lineup and on/off stats'''
+
+    game_ids = ['0040200221', '0040200222', '0040200223', '0040200224', '0040200225', '0040200226']
+
+    def test_lineups(self):
+        lineups = PBPLineups(self.game_ids, "LAL")
+        segments = lineups.get_processed_logs()
+        first_game = segments[segments["GAME_ID"] == "0040200221"]
+
+        # Segments add up to the final score and the team's possessions
+        self.assertEqual(first_game["PTS"].sum(), 82)
+        self.assertEqual(first_game["OPP_PTS"].sum(), 87)
+        self.assertAlmostEqual(first_game["POSS"].sum(), 95.3088)
+
+        stats = lineups.nba_stats()
+        self.assertListEqual(list(stats.columns), PBPLineups.expected_lineup_columns)
+        self.assertTupleEqual(stats["PLAYER_IDS"].loc[0], (109, 406, 965, 977, 1904))
+        self.assertEqual(stats["PTS"].sum(), segments[segments["PLAYERS"] == 5]["PTS"].sum())
+
+    def test_on_off(self):
+        lineups = PBPLineups(self.game_ids, "LAL")
+        on_off = lineups.on_off().set_index("PLAYER_ID")
+        total_poss = lineups.nba_stats()["POSS"].sum()
+
+        self.assertAlmostEqual(on_off.loc[977, "ON_POSS"] + on_off.loc[977, "OFF_POSS"], total_poss)
+        self.assertEqual(round(on_off.loc[406, "ON_OFF"], 1), 20.7)
+
+    def test_team_not_in_games(self):
+        lineups = PBPLineups(self.game_ids[:1], "BOS")
+        self.assertIsNotNone(lineups.error)
+        self.assertTrue(lineups.nba_stats().empty)
+
+if __name__ == '__main__':
+    unittest.main()
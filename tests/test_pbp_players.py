@@ -1,10 +1,15 @@
 '''Testing play-by-play player methods (NBA-Stats only).'''
+import os
+import tempfile
 import unittest
+from unittest import mock
 import pandas as pd
 
 from dans.endpoints.playbyplay.pbpplayerstats import PBPPlayerStats
 from dans.endpoints.playbyplay.pbpplayerlogs import PBPPlayerLogs
+from dans.library.cache import Cache
 from dans.library.parameters import DataFormat, SeasonType
+from dans.library.pbp_counter import PBPCounter
 
 class TestPBPPlayers(unittest.TestCase):
     '''Tests for each boxscore player endpoint: NBA-Stats only'''
@@ -55,3 +60,50 @@ class TestPBPPlayers(unittest.TestCase):
         self.assertEqual(round(opp_pace_adj_stats["LA_PACE"].loc[0], 1), 90.6)
         self.assertEqual(round(opp_pace_adj_stats["rDRTG"].loc[0], 1), -4.1)
         self.assertEqual(round(opp_pace_adj_stats["rADJ_DRTG"].loc[0], 1), -4.3)
+
+    def test_load_games_counts_every_player(self):
+        with mock.patch.object(Cache, "insert_logs") as insert_logs:
+            logs = PBPPlayerStats.load_games(["0040200221"])
+            insert_logs.assert_called_once()
+
+        # Both teams' points add up to the final score
+        self.assertEqual(logs["PTS"].sum(), 87 + 82)
+        kobe = logs[logs["PLAYER_ID"] == 977].iloc[0]
+        self.assertEqual(kobe["PTS"], 37)
+        self.assertEqual(kobe["FGA"], 38)
+        self.assertEqual(round(kobe["PLAYER_POSS"], 4), 88.5888)
+
+    def test_stored_games_in_processes(self):
+        logs = PBPPlayerLogs("Kobe Bryant", year_range=[2003, 2003], season_type=SeasonType.playoffs).nba_stats()
+        with mock.patch.object(Cache, "insert_logs"), \
+            mock.patch.object(Cache, "lookup_logs", return_value=pd.DataFrame()):
+            # The first run stores the games, so the second one can process them in workers
+            serial = PBPPlayerStats(logs, drtg_range=[90, 100]).get_processed_logs()
+            with mock.patch.object(PBPPlayerStats, "processes", 2), \
+                mock.patch.object(PBPPlayerStats, "chunksize", 2):
+                parallel = PBPPlayerStats(logs, drtg_range=[90, 100]).get_processed_logs()
+
+        pd.testing.assert_frame_equal(parallel.reset_index(drop=True), serial.reset_index(drop=True))
+
+    def test_stale_rows_are_recomputed(self):
+        original_path = Cache.path
+        Cache.configure(path=os.path.join(tempfile.mkdtemp(), "cache.sqlite"))
+        try:
+            PBPPlayerStats.load_games(["0040200221"])
+            version = PBPPlayerStats.fingerprint()
+            self.assertEqual(len(Cache().lookup_logs(977, ["0040200221"], version)), 1)
+            self.assertNotIn("0040200221", Cache().stale(version)["GAME_ID"].tolist())
+
+            # A change to counting makes the game's rows stale, but leaves them in the cache
+            with mock.patch.object(PBPCounter, "version", PBPCounter.version + 1):
+                new_version = PBPPlayerStats.fingerprint()
+                self.assertNotEqual(new_version, version)
+                self.assertTrue(Cache().lookup_logs(977, ["0040200221"], new_version).empty)
+                self.assertIn("0040200221", Cache().stale(new_version)["GAME_ID"].tolist())
+
+                refreshed = PBPPlayerStats.refresh_stale()
+                self.assertIn("0040200221", refreshed["GAME_ID"].tolist())
+                self.assertEqual(len(Cache().lookup_logs(977, ["0040200221"], new_version)), 1)
+                self.assertTrue(Cache().stale(new_version).empty)
+        finally:
+            Cache.configure(path=original_path)
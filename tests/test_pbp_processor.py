@@ -0,0 +1,64 @@
+'''Testing play-by-play processing.'''
+import unittest
+import numpy as np
+import pandas as pd
+
+from nba_api.stats.endpoints.playbyplayv2 import PlayByPlayV2
+from dans.library.nba_api_client import NBAApiClient
+from dans.library.pbp_processor import PBPProcessor
+from dans.library.pbp_schema import EVENT_DTYPES, memory_report
+
+class TestPBPProcessor(unittest.TestCase):
+    '''Tests for game-level play-by-play processing'''
+
+    def test_on_court(self):
+        rotation = pd.DataFrame({
+            "PERSON_ID": [2, 1, 2, 3],
+            "IN_TIME_REAL": [0.0, 0.0, 300.0, 100.0],
+            "OUT_TIME_REAL": [100.0, 400.0, 400.0, 300.0],
+        })
+        players, matrix = PBPProcessor().on_court(rotation, [0, 99, 100, 250.5, 300, 400])
+
+        self.assertListEqual(players.tolist(), [1, 2, 3])
+        # Stints include their start but not their end
+        self.assertListEqual(matrix.tolist(), [
+            [True, True, False],
+            [True, True, False],
+            [True, False, True],
+            [True, False, True],
+            [True, True, False],
+            [False, False, False],
+        ])
+
+    def test_merged_events(self):
+        client = NBAApiClient()
+        events = client.get_game("0040200221")["events"]
+        pbp_v2 = client._request_endpoint("0040200221", PlayByPlayV2)[0].dropna(subset=["EVENTNUM"])
+
+        # Every V2 event is joined to exactly one V3 row
+        self.assertEqual(events["EVENTNUM"].notna().sum(), len(pbp_v2))
+        block = events[events["description"] == "Duncan BLOCK (1 BLK)"].iloc[0]
+        shot = events[events["actionNumber"] == block["actionNumber"]].iloc[0]
+        self.assertTrue(pd.isna(block["EVENTNUM"]))
+        self.assertEqual(shot["PLAYER3_ID"], 1495)
+
+    def test_compact_events(self):
+        processor = PBPProcessor()
+        game = processor.fetch("0040200221")
+        self.assertDictEqual({column: str(dtype) for column, dtype in game["events"].dtypes.items()},
+                             EVENT_DTYPES)
+
+        prepared = processor.prepare("0040200221", game)
+        events = prepared["events"]
+        for column, dtype in [("scoreHome", "int16"), ("margin", "int16"), ("minutes", "int8"),
+                              ("maxMargin", "int8"), ("time", "float64"), ("events", "uint16")]:
+            self.assertEqual(str(events[column].dtype), dtype)
+        self.assertEqual(events["scoreHome"].iloc[-1], 87)
+
+        report = memory_report(prepared)
+        self.assertSetEqual(set(report["FRAME"]), {"all_logs", "events", "rotations_0", "rotations_1"})
+        self.assertEqual(report.loc[report["FRAME"] == "events", "BYTES"].sum(),
+                         events.memory_usage(index=False, deep=True).sum())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+'''Testing player name resolution.'''
+import unittest
+import pandas as pd
+
+from dans.endpoints.boxscore.bxplayerlogs import BXPlayerLogs
+from dans.endpoints.playbyplay.pbpplayerlogs import PBPPlayerLogs
+from dans.library.player_index import PlayerIndex, normalize
+from dans.library.reference_data import ReferenceData
+
+class TestPlayerIndex(unittest.TestCase):
+    '''Tests for exact, normalized and near-miss name lookups'''
+
+    def test_normalize(self):
+        names = pd.Series(["Luka Dončić", "P.J. Tucker", "Shaquille O'Neal", "Karl-Anthony  Towns"])
+        self.assertEqual(normalize(names).tolist(),
+                         ["luka doncic", "pj tucker", "shaquille oneal", "karl anthony towns"])
+
+    def test_resolve(self):
+        resolved = PlayerIndex.resolve(["Kobe Bryant", "luka doncic", "PJ Tucker", "bobby jones", "Kobe Bryan"])
+        self.assertEqual(resolved["MATCH"].tolist(), ["exact", "normalized", "normalized", "ambiguous", "none"])
+        self.assertEqual(resolved.loc[0, "SUFFIX"], "bryanko01")
+        self.assertEqual(resolved.loc[0, "NBA_ID"], 977)
+        self.assertEqual(resolved.loc[1, "SUFFIX"], "doncilu01")
+        self.assertEqual(resolved.loc[2, "SUFFIX"], ReferenceData.find("player_names", "NAME", "P.J. Tucker")["SUFFIX"])
+        self.assertTrue(resolved.loc[3:, "NBA_ID"].isna().all())
+        self.assertEqual(resolved.loc[4, "CANDIDATES"][0], "Kobe Bryant")
+        self.assertEqual(resolved.loc[0, "CANDIDATES"], [])
+
+        # Exact duplicate names resolve to their first player, like before
+        self.assertEqual(PlayerIndex.resolve(["Bobby Jones"]).loc[0, "NBA_ID"],
+                         ReferenceData.find("player_ids", "NAME", "Bobby Jones")["NBA_ID"])
+
+    def test_links(self):
+        links = PlayerIndex.links()
+        self.assertEqual(links.loc[links["SUFFIX"] == "bryanko01", "NBA_ID"].tolist(), [977])
+        self.assertFalse(links["SUFFIX"].duplicated().any())
+        self.assertFalse(links["NBA_ID"].duplicated().any())
+
+    def test_endpoint_lookups(self):
+        self.assertEqual(BXPlayerLogs("luka dončić", [2020, 2020]).suffix, "doncilu01")
+        self.assertEqual(PBPPlayerLogs("Kobe Bryant", [2003, 2003]).player_id, 977)
+        self.assertEqual(PBPPlayerLogs("luka dončić", [2020, 2020]).name,
+                         ReferenceData.find("player_ids", "NBA_ID", 1629029)["NAME"])
+        self.assertEqual(PlayerIndex.find("Kobe Bryant", "NBA_ID")[1], "Kobe Bryant")
+
+        logs = PBPPlayerLogs("Kobe Bryan", [2003, 2003])
+        self.assertIsNone(logs.player_id)
+        self.assertIn("Did you mean `Kobe Bryant`", logs.error)
+
+if __name__ == '__main__':
+    unittest.main()
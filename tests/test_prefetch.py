@@ -0,0 +1,31 @@
+'''Testing the prefetch pipeline.'''
+import time
+import unittest
+
+from dans.library.prefetch import prefetch
+
+class TestPrefetch(unittest.TestCase):
+    '''Tests for overlapping fetches with processing'''
+
+    def test_results_keep_input_order(self):
+        # Later items finish first, but are still yielded in order
+        def fetch(item):
+            time.sleep(0.01 * (5 - item))
+            return item * item
+
+        results = [(item, future.result()) for item, future in prefetch(fetch, range(5), depth=3)]
+        self.assertListEqual(results, [(item, item * item) for item in range(5)])
+
+    def test_errors_are_raised_for_their_item(self):
+        def fetch(item):
+            if item == 1:
+                raise ValueError(item)
+            return item
+
+        futures = dict(prefetch(fetch, range(3), depth=2))
+        self.assertEqual(futures[2].result(), 2)
+        with self.assertRaises(ValueError):
+            futures[1].result()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+'''Testing the reference data registry.'''
+import unittest
+from unittest import mock
+import pandas as pd
+
+from dans.library.reference_data import ReferenceData
+
+class TestReferenceData(unittest.TestCase):
+    '''Tests for shared reference tables and their indexes'''
+
+    def test_tables_are_read_once(self):
+        with mock.patch("pandas.read_csv", wraps=pd.read_csv) as read_csv:
+            ReferenceData.reload("season_averages")
+            seasons = ReferenceData.table("season_averages")
+            self.assertIs(ReferenceData.table("season_averages"), seasons)
+            self.assertEqual(read_csv.call_count, 1)
+
+            ReferenceData.reload()
+            self.assertIsNot(ReferenceData.table("season_averages"), seasons)
+            self.assertEqual(read_csv.call_count, 2)
+
+    def test_find(self):
+        self.assertEqual(ReferenceData.find("player_ids", "NAME", "Kobe Bryant")["NBA_ID"], 977)
+        self.assertIsNone(ReferenceData.find("player_ids", "NAME", "Kobe Bryan"))
+
+        opp = ReferenceData.find("nba_stats_teams", ["SEASON", "MATCHUP"], (2003, "SAS"))
+        teams = ReferenceData.table("nba_stats_teams")
+        expected = teams[(teams["SEASON"] == 2003) & (teams["MATCHUP"] == "SAS")].iloc[0]
+        pd.testing.assert_series_equal(opp, expected)
+
+        # Duplicate keys resolve to the first row, and any frame can be indexed
+        frame = pd.DataFrame({"KEY": ["a", "b", "a"], "VALUE": [1, 2, 3]})
+        self.assertEqual(ReferenceData.find(frame, "KEY", "a")["VALUE"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
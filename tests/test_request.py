@@ -0,0 +1,376 @@
+'''Testing the request layer.'''
+import os
+import time
+import asyncio
+import datetime
+import threading
+import tempfile
+import unittest
+import http.server
+from unittest import mock
+import numpy as np
+import pandas as pd
+import requests
+import lxml.etree
+
+from nba_api.stats.endpoints.playbyplayv3 import PlayByPlayV3
+from dans.library.parameters import TransportMode
+from dans.library.request.cassette import Cassette, request_identity, request_key
+from dans.library.request.cache.mock_response import MockResponse, MockAPIResponse
+from dans.library.request.data_sources import DataSourceFactory
+from dans.library.request.request import Request
+from dans.library.request.nba_stats import NBAStatsSource
+from dans.library.request.basketball_reference import BasketballReferenceSource
+from dans.library.request.rate_limiter import RateLimiter, TokenBucket
+from dans.library.request.retry import RequestError, RetryPolicy
+from dans.library.request import single_flight
+from dans.library.request.single_flight import SingleFlight
+from dans.library.request.response_cache import ResponseCache, current_season, request_season
+
+class TestCassette(unittest.TestCase):
+    '''Tests for the record/replay transport'''
+
+    def setUp(self):
+        self.path = Cassette.path
+        self.mode = Cassette.mode
+
+    def tearDown(self):
+        Cassette.configure(mode=self.mode, path=self.path)
+
+    def test_request_key_is_canonical(self):
+        key = request_key(request_identity(url="https://stats.nba.com/stats/x",
+                                           params=(("Season", "2002-03"), ("PerMode", None))))
+        same_key = request_key(request_identity(url="https://stats.nba.com/stats/x",
+                                                params=(("PerMode", None), ("Season", "2002-03"))))
+        self.assertEqual(key, same_key)
+
+        api_key = request_key(request_identity(function=PlayByPlayV3,
+                                               args={"game_id": "0040200221", "season": 1}))
+        same_api_key = request_key(request_identity(function=PlayByPlayV3,
+                                                    args={"season": np.int64(1), "game_id": "0040200221"}))
+        self.assertEqual(api_key, same_api_key)
+
+    def test_record_then_replay(self):
+        with tempfile.TemporaryDirectory() as path:
+            Cassette.configure(mode=TransportMode.record, path=path)
+            http = request_identity(url="https://www.basketball-reference.com/x/", params={})
+            api = request_identity(function=PlayByPlayV3, args={"game_id": "0040200221"})
+            Cassette.record(http, MockResponse(status_code=200, text="<table></table>"))
+            Cassette.record(api, MockAPIResponse(data_frames=[pd.DataFrame({"gameId": ["0040200221"]})]))
+            self.assertTrue(os.path.exists(os.path.join(path, Cassette.index_file)))
+
+            # A fresh process only sees what is on disk
+            Cassette.configure(mode=TransportMode.replay, path=path)
+            self.assertEqual(Cassette.play(http).text, "<table></table>")
+            self.assertEqual(Cassette.play(api).get_data_frames()[0]["gameId"].iloc[0], "0040200221")
+            with self.assertRaises(KeyError):
+                Cassette.play(request_identity(url="https://www.basketball-reference.com/y/"))
+
+class TestResponseCache(unittest.TestCase):
+    '''Tests for the persistent response cache'''
+
+    def setUp(self):
+        self.path = ResponseCache.path
+        self.directory = tempfile.TemporaryDirectory()
+        ResponseCache.configure(path=os.path.join(self.directory.name, "responses.sqlite"))
+
+    def tearDown(self):
+        ResponseCache.configure(path=self.path)
+        self.directory.cleanup()
+
+    def test_request_season(self):
+        self.assertEqual(current_season(datetime.date(2025, 3, 1)), 2025)
+        self.assertEqual(current_season(datetime.date(2025, 8, 1)), 2026)
+        self.assertEqual(request_season(request_identity(
+            function=PlayByPlayV3, args={"game_id": "0040200221"})), 2003)
+        self.assertEqual(request_season(request_identity(
+            function=PlayByPlayV3, args={"game_id": "0049600001"})), 1997)
+        self.assertEqual(request_season(request_identity(
+            url="https://stats.nba.com/stats/playergamelogs", params=(("Season", "2014-15"),))), 2015)
+        self.assertEqual(request_season(request_identity(
+            url="https://www.basketball-reference.com/teams/MIL/1974/gamelog-advanced/")), 1974)
+        self.assertIsNone(request_season(request_identity(
+            url="https://www.basketball-reference.com/players/c/curryst01/gamelog-playoffs/")))
+
+    def test_hits_misses_and_expiry(self):
+        past = request_identity(url="https://www.basketball-reference.com/teams/MIL/1974/gamelog-advanced/")
+        live = request_identity(url="https://www.basketball-reference.com/players/c/curryst01/gamelog-playoffs/")
+        hits, misses = ResponseCache.hits, ResponseCache.misses
+
+        self.assertIsNone(ResponseCache.get(past))
+        ResponseCache.put(past, MockResponse(status_code=200, text="past"))
+        ResponseCache.put(live, MockResponse(status_code=200, text="live"))
+        ResponseCache.put(request_identity(url="https://www.basketball-reference.com/x/"),
+                          MockResponse(status_code=429, text=""))
+        self.assertEqual(ResponseCache.get(past).text, "past")
+        self.assertEqual(ResponseCache.get(live).text, "live")
+        self.assertIsNone(ResponseCache.get(request_identity(url="https://www.basketball-reference.com/x/")))
+        self.assertEqual((ResponseCache.hits - hits, ResponseCache.misses - misses), (2, 2))
+
+        # Current-season responses expire, completed seasons never do
+        ttl = dict(ResponseCache.ttl)
+        ResponseCache.configure(ttl={"www.basketball-reference.com": -1})
+        try:
+            ResponseCache.put(live, MockResponse(status_code=200, text="live"))
+        finally:
+            ResponseCache.ttl = ttl
+        self.assertIsNone(ResponseCache.get(live))
+        self.assertEqual(ResponseCache.get(past).text, "past")
+
+    def test_processes_open_their_own_connection(self):
+        past = request_identity(url="https://www.basketball-reference.com/teams/MIL/1974/gamelog-advanced/")
+        ResponseCache.put(past, MockResponse(status_code=200, text="past"))
+        connection = ResponseCache._connect()
+        with mock.patch("os.getpid", return_value=-1):
+            self.assertIsNot(ResponseCache._connect(), connection)
+            self.assertEqual(ResponseCache.get(past).text, "past")
+        self.assertIs(ResponseCache._connect(), connection)
+
+    def test_api_frames_round_trip(self):
+        identity = request_identity(function=PlayByPlayV3, args={"game_id": "0040200221"})
+        frames = [pd.DataFrame({"gameId": ["0040200221"], "scoreHome": [""]}), pd.DataFrame({"a": [1]})]
+        ResponseCache.put(identity, MockAPIResponse(data_frames=frames))
+        cached = ResponseCache.get(identity).get_data_frames()
+        self.assertEqual(len(cached), 2)
+        self.assertEqual(cached[0]["gameId"].iloc[0], "0040200221")
+
+class TestSessions(unittest.TestCase):
+    '''Tests for pooled data source sessions'''
+
+    def test_session_is_pooled_and_reused(self):
+        source = DataSourceFactory.get_source(url="https://stats.nba.com/stats/playergamelogs")
+        self.assertIs(source, DataSourceFactory.get_source(url="https://stats.nba.com/stats/teams"))
+        self.assertIs(source.session, source.session)
+
+        DataSourceFactory.configure_sessions(pool_size=4, retries=1)
+        try:
+            adapter = source.session.get_adapter("https://stats.nba.com")
+            self.assertEqual(adapter._pool_maxsize, 4)
+            self.assertEqual(adapter.max_retries.total, 1)
+        finally:
+            DataSourceFactory.configure_sessions(pool_size=10, retries=3)
+
+class TestRateLimiter(unittest.TestCase):
+    '''Tests for the per-host token buckets'''
+
+    def test_buckets_are_per_host(self):
+        RateLimiter.configure("a.example.com", calls=2, period=60)
+        RateLimiter.configure("b.example.com", calls=2, period=60)
+        limiter = RateLimiter()
+        self.assertEqual(limiter.bucket("a.example.com").reserve(), 0)
+        self.assertEqual(limiter.bucket("a.example.com").reserve(), 0)
+        self.assertAlmostEqual(limiter.bucket("a.example.com").reserve(), 30, delta=0.1)
+        self.assertEqual(limiter.bucket("b.example.com").reserve(), 0)
+
+    def test_aimd_backoff(self):
+        bucket = TokenBucket(calls=60, period=60)
+        bucket.throttled()
+        bucket.throttled()
+        self.assertAlmostEqual(bucket.rate, 0.25)
+        bucket.succeeded()
+        self.assertAlmostEqual(bucket.rate, 0.35)
+        for _ in range(20):
+            bucket.succeeded()
+        self.assertAlmostEqual(bucket.rate, 1.0)
+
+        bucket.throttled(retry_after=5)
+        self.assertGreater(bucket.reserve(), 4)
+
+    def test_throttled_responses_back_off(self):
+        RateLimiter.configure("c.example.com", calls=6000, period=60)
+        limiter = RateLimiter()
+        # Throttled responses are returned for the RetryPolicy to retry
+        self.assertEqual(limiter.make_request("c.example.com", lambda: MockResponse(status_code=429)).status_code, 429)
+        self.assertLess(RateLimiter.stats()["c.example.com"]["rate"], 6000)
+
+class TestRetryPolicy(unittest.TestCase):
+    '''Tests for retries of transient failures'''
+
+    def setUp(self):
+        self.policy = RetryPolicy()
+        self.policy.base_delay = 0
+
+    def test_transient_failures_are_retried(self):
+        responses = iter([MockResponse(status_code=502), MockResponse(status_code=200, text="ok")])
+        response = self.policy.call(lambda: RetryPolicy.check(next(responses)))
+        self.assertEqual(response.text, "ok")
+
+    def test_permanent_failures_are_not_retried(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return RetryPolicy.check(MockResponse(status_code=404))
+
+        with self.assertRaises(RequestError) as context:
+            self.policy.call(fetch)
+        self.assertFalse(context.exception.transient)
+        self.assertEqual(len(calls), 1)
+
+    def test_gives_up_after_max_attempts(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            raise requests.exceptions.ConnectionError()
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.policy.call(fetch)
+        self.assertEqual(len(calls), RetryPolicy.max_attempts)
+
+    def test_failing_host_is_called_once_per_attempt(self):
+        calls = []
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                calls.append(self.path)
+                self.send_response(Handler.status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        # The path routes the request to the stats.nba.com source and its session
+        url = f"http://127.0.0.1:{server.server_port}/stats.nba.com/stats/playergamelogs"
+        mode = Cassette.mode
+        Cassette.configure(mode=TransportMode.off)
+        RateLimiter.configure("stats.nba.com", calls=6000, period=60)
+        try:
+            with mock.patch.object(RetryPolicy, "base_delay", 0):
+                for status in [503, 500]:
+                    calls.clear()
+                    Handler.status = status
+                    request = Request(url=url, year=2024, season_type="Playoffs")
+                    self.assertTrue(request.get_response().empty)
+                    self.assertIn(str(status), str(request.error))
+                    self.assertEqual(len(calls), RetryPolicy.max_attempts)
+        finally:
+            server.shutdown()
+            server.server_close()
+            Cassette.configure(mode=mode)
+            RateLimiter.configure("stats.nba.com", *RateLimiter.limits["default"])
+
+class TestSingleFlight(unittest.TestCase):
+    '''Tests for deduplication of in-flight requests'''
+
+    def test_concurrent_calls_share_one_fetch(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return pd.DataFrame({"PTS": [30]})
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(SingleFlight.do("key", fetch)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([result["PTS"].iloc[0] for result in results], [30] * 5)
+        # Every caller can modify its own result
+        self.assertEqual(len({id(result) for result in results}), 5)
+
+    def test_first_caller_can_modify_its_result(self):
+        shared = SingleFlight.shared
+
+        def fetch():
+            # Waits for the second caller to join
+            while SingleFlight.shared == shared:
+                time.sleep(0.01)
+            return pd.DataFrame({"PTS": [30]})
+
+        def lead():
+            SingleFlight.do("modified", fetch)["PTS"] = 0
+
+        results = []
+        leader = threading.Thread(target=lead)
+        follower = threading.Thread(target=lambda: results.append(SingleFlight.do("modified", fetch)))
+        copy = single_flight._copy
+
+        def slow_copy(result):
+            # Followers copy after the first caller has modified its result
+            time.sleep(0.1)
+            return copy(result)
+
+        with mock.patch.object(single_flight, "_copy", slow_copy):
+            leader.start()
+            time.sleep(0.05)
+            follower.start()
+            leader.join()
+            follower.join()
+        self.assertEqual(results[0]["PTS"].iloc[0], 30)
+
+    def test_concurrent_coroutines_share_one_fetch(self):
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return pd.DataFrame({"PTS": [30]})
+
+        async def run():
+            return await asyncio.gather(*(SingleFlight.do_async("key", fetch) for _ in range(5)))
+
+        self.assertEqual(len(asyncio.run(run())), 5)
+        self.assertEqual(len(calls), 1)
+
+class TestBasketballReferenceParser(unittest.TestCase):
+    '''Tests for bball-ref table extraction'''
+
+    def test_targeted_extraction_matches_full_parse(self):
+        source = BasketballReferenceSource()
+        for page, table_id in [("KB2003BX.txt", "player_game_log_post"),
+                               ("KAJ1974BX.txt", "player_game_log_reg"),
+                               ("MIL1974BX.txt", "team_game_log_adv_reg")]:
+            with open(os.path.join(Cassette.path, "data", page), "r", encoding="utf-8") as file:
+                html = file.read()
+            fragment = source._table_fragment(html, {"id": table_id})
+            self.assertIsNotNone(fragment)
+            pd.testing.assert_frame_equal(source._parse_fragment(fragment),
+                                          source._parse_with_soup(html, {"id": table_id}))
+
+    def test_missing_table(self):
+        response = MockResponse(status_code=200, text="<html><table id='other'></table></html>")
+        self.assertTrue(BasketballReferenceSource().parse_response(response, {"id": "missing"}).empty)
+
+    def test_only_parse_errors_fall_back(self):
+        response = MockResponse(status_code=200, text="<html><table id='t'><tbody><tr><td>1</td></tr></tbody></table></html>")
+        source = BasketballReferenceSource()
+        with mock.patch.object(source, "_parse_fragment", side_effect=lxml.etree.ParserError("")):
+            self.assertEqual(source.parse_response(response, {"id": "t"}).iloc[0, 0], "1")
+        # Other errors aren't hidden by the fallback
+        with mock.patch.object(source, "_parse_fragment", side_effect=KeyError("bug")):
+            with self.assertRaises(KeyError):
+                source.parse_response(response, {"id": "t"})
+
+class TestNBAStatsParser(unittest.TestCase):
+    '''Tests for schema-driven decoding of nba-stats result sets'''
+
+    def setUp(self):
+        with open(os.path.join(Cassette.path, "data", "KB2003_adv.txt"), "r", encoding="utf-8") as file:
+            self.response = MockResponse(status_code=200, text=file.read())
+
+    def test_columns_are_decoded_into_final_dtypes(self):
+        table = NBAStatsSource().parse_response(self.response)
+        self.assertEqual(len(table.columns), 81)
+        self.assertEqual(table["TEAM_ABBREVIATION"].dtype, "category")
+        self.assertEqual(table["GAME_DATE"].dtype, "datetime64[ns]")
+        self.assertEqual(table["POSS"].dtype, "int64")
+        self.assertEqual(table["PACE_RANK"].dtype, "int32")
+        self.assertEqual(table["GAME_ID"].iloc[0][:2], "00")
+        # Columns with no values keep them as None
+        self.assertTrue(table["AVAILABLE_FLAG"].isna().all())
+
+    def test_only_requested_columns_are_decoded(self):
+        table = NBAStatsSource().parse_response(self.response, ["GAME_DATE", "PLAYER_NAME", "POSS"])
+        self.assertListEqual(list(table.columns), ["PLAYER_NAME", "GAME_DATE", "POSS"])
+
+if __name__ == '__main__':
+    unittest.main()